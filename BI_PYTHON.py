@@ -1,10 +1,27 @@
+import logging
+import os
+
 import streamlit as st
 import pandas as pd
-from supabase import create_client
+from supabase import ClientOptions, create_client
 from PIL import Image
-from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, JsCode
 from datetime import datetime
 from st_aggrid.shared import JsCode
+from streamlit.errors import StreamlitAPIException
+
+from bi.arvore import ArvoreSobDemanda, montar_arvore
+from bi.comparativo import diferenca_resultados, meta_vs_atual
+from bi.conexao import ConexaoHttp
+from bi.cubo import montar_cubo
+from bi.datasets import CONTAS_PAGAR, criar_cache
+from bi.estilos import estilos_por_sinal
+from bi.filtros import IndiceFiltros, PlanoFiltros
+from bi.formatacao import formatador_reais, formatar_real
+from bi.metas import MatrizMensal, MemoMetas, chave_meta, ultimos_meses
+from bi.motor_duckdb import TOLERANCIA_ABSOLUTA, TOLERANCIA_RELATIVA, MotorDuckDB
+from bi.paginacao import fatiar_pagina, filtrar_texto
+from bi.tratamento import ordem_meses
 
 
 # ==============================
@@ -17,8 +34,6 @@ st.set_page_config(
     layout="wide"
 )
 
-data_atual = datetime.now().strftime("%d/%m/%Y")
-
 # 🔹 CSS + Barra Fixa
 st.markdown(f"""
 <style>
@@ -64,16 +79,13 @@ header {{visibility: hidden;}}
     color: gray;
 }}
 
-</style>
-
-<div class="topbar">
-    <div style="display:flex; align-items:center; gap:15px;">
-        <img src="https://raw.githubusercontent.com/dataflowb2b-glitch/BI_PYTHON/main/LOGO%20NOVA%20DAS%20NOVAS.jpeg" width="140">
-        <div class="title">📊GESTÃO DE RESULTADO FINANCEIRO</div>
-    </div>
-    <div class="date">Atualizado em {data_atual}</div>
-</div>
+.cache-info {{
+    font-size: 12px;
+    color: #9ca3af;
+    margin-left: 8px;
+}}
 
+</style>
 """, unsafe_allow_html=True)
 
 
@@ -86,18 +98,168 @@ header {{visibility: hidden;}}
 # FUNÇÕES
 # ==============================
 
-def formatar_real(valor):
-    if pd.isna(valor):
-        return ""
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+def aplicar_janela_meses(chave, opcoes, n_meses):
+    st.session_state[chave] = ultimos_meses(opcoes, n_meses) if n_meses else []
+
+
+def botoes_janela_meses(chave, opcoes):
+    # 🔹 Atalhos para a base da média (últimos N meses fechados até hoje);
+    # "Todos" limpa a seleção (média sobre todos os meses)
+    janelas = [("Últimos 3 meses", 3), ("Últimos 6 meses", 6), ("Últimos 12 meses", 12), ("Todos os meses", None)]
+
+    for coluna, (rotulo, n_meses) in zip(st.columns(len(janelas)), janelas):
+        coluna.button(
+            rotulo,
+            key=f"{chave}_janela_{n_meses or 'todos'}",
+            on_click=aplicar_janela_meses,
+            args=(chave, opcoes, n_meses)
+        )
+
+
+def manter_estado_widgets(chaves):
+    # 🔹 Widgets de abas não exibidas somem do session_state; regravar mantém a escolha do usuário
+    for chave in chaves:
+        if chave in st.session_state:
+            st.session_state[chave] = st.session_state[chave]
+
+
+def exibir_arvore_aggrid(arvore, chave, configurar_colunas, escopo_rerun="app"):
+
+    # 🔹 Sob demanda: o navegador recebe só os nós abertos; clicar numa linha abre/fecha.
+    # Cada clique custa uma ida ao servidor e remonta o grid (perde rolagem e larguras),
+    # então só vem ligado quando a árvore completa é grande demais para mandar de uma vez
+    # (padrão via session_state: a chave é mantida entre abas por manter_estado_widgets)
+    st.session_state.setdefault(f"{chave}_sob_demanda", len(arvore) > LIMITE_ARVORE_SOB_DEMANDA)
+    sob_demanda = st.toggle(
+        "Carregar níveis sob demanda",
+        key=f"{chave}_sob_demanda"
+    )
+
+    if sob_demanda:
+        loja = ArvoreSobDemanda(arvore)
+        expandidos = st.session_state.setdefault(f"{chave}_expandidos", set())
+        rodada = st.session_state.setdefault(f"{chave}_rodada", 0)
+        dados = loja.visiveis(expandidos)
+    else:
+        dados = arvore
+
+    gb = GridOptionsBuilder.from_dataframe(dados)
+
+    configurar_colunas(gb)
+
+    if sob_demanda:
+        gb.configure_column("Abrir", header_name="", width=60, pinned="left")
+        gb.configure_selection("single")
+
+    gb.configure_grid_options(
+        treeData=True,
+        animateRows=True,
+        groupDefaultExpanded=-1 if sob_demanda else 0,
+        getDataPath=JsCode("function(data) { return data.path; }")
+    )
+
+    resposta = AgGrid(
+        dados,
+        gridOptions=gb.build(),
+        enable_enterprise_modules=True,
+        fit_columns_on_grid_load=True,
+        theme="streamlit",
+        allow_unsafe_jscode=True,
+        height=650,
+        update_mode=GridUpdateMode.SELECTION_CHANGED if sob_demanda else GridUpdateMode.MODEL_CHANGED,
+        key=f"{chave}_grid_{rodada}" if sob_demanda else f"{chave}_grid"
+    )
+
+    if not sob_demanda:
+        return
+
+    selecionadas = resposta.selected_rows
+    if isinstance(selecionadas, pd.DataFrame):
+        selecionadas = selecionadas.to_dict("records")
+
+    for linha in selecionadas or []:
+        caminho = tuple(linha["path"])
+        if loja.tem_filhos(caminho):
+            expandidos ^= {caminho}
+            # 🔹 Nova chave remonta o grid sem seleção: o próximo clique na mesma linha fecha
+            st.session_state[f"{chave}_rodada"] = rodada + 1
+            try:
+                st.rerun(scope=escopo_rerun)
+            except StreamlitAPIException:
+                # 🔹 Durante a execução completa o fragmento não pode pedir rerun só dele
+                st.rerun()
 
 # ==============================
 # CONFIGURAÇÃO
 # ==============================
 
+log = logging.getLogger("bi")
+
 url = "https://sbpgrmsxdmunnzsckqrh.supabase.co"
 key = "sb_publishable_TmQzWQo_ceBPYD91ME9Sjw_azJWpNkR"
-supabase = create_client(url, key)
+
+
+# 🔹 Um cliente HTTP por processo (pool keep-alive, HTTP/2 se o h2 estiver instalado, retentativas):
+# sessões e reruns reaproveitam as conexões em vez de refazer TCP + TLS a cada carga
+@st.cache_resource
+def obter_conexao_http():
+    return ConexaoHttp()
+
+
+@st.cache_resource
+def obter_supabase():
+    return create_client(url, key, options=ClientOptions(httpx_client=obter_conexao_http().cliente))
+
+
+conexao_http = obter_conexao_http()
+supabase = obter_supabase()
+
+# 🔹 View, data, dimensões, renomeações e exclusões ficam na definição (bi/datasets.py)
+DATASET = CONTAS_PAGAR
+
+# 🔹 Carga paginada da view (PostgREST limita as linhas por requisição)
+TAMANHO_PAGINA = 1000
+MAX_WORKERS_CARGA = 8
+
+# 🔹 Tempo de vida do dataset em cache (segundos), compartilhado entre sessões
+TTL_CACHE_SEGUNDOS = 600
+
+# 🔹 Sincronização incremental: busca só o que mudou desde a última marca d'água
+RECONCILIAR_A_CADA_SEGUNDOS = 6 * 60 * 60
+
+# 🔹 Snapshot local (Arrow IPC) para partida a frio; BI_OFFLINE=1 usa só o arquivo salvo
+PASTA_SNAPSHOTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+MODO_OFFLINE = os.environ.get("BI_OFFLINE") == "1"
+
+# 🔹 BI_AGREGACAO=rpc: o Postgres soma os grupos (sql/bi_agregar_contas.sql) e só o cubo vem pela rede;
+# "sqlite" roda a mesma agregação localmente; padrão "linhas" baixa os lançamentos
+AGREGACAO = os.environ.get("BI_AGREGACAO", "linhas")
+
+# 🔹 BI_MOTOR=duckdb: comparativos meta x atual em SQL no DuckDB (multi-core) em vez do pandas;
+# BI_CONFERIR_MOTOR=1 recalcula no pandas e avisa se o resultado divergir
+MOTOR = os.environ.get("BI_MOTOR", "pandas")
+CONFERIR_MOTOR = os.environ.get("BI_CONFERIR_MOTOR") == "1"
+
+# 🔹 BI_TRATAMENTO=polars: limpeza da carga no Polars (lazy, multi-thread), pandas só na saída
+TRATAMENTO = os.environ.get("BI_TRATAMENTO", "pandas")
+
+# 🔹 BI_INGESTAO=csv: páginas pedidas em text/csv e lidas em streaming para Arrow (menos pico de
+# memória que a lista de dicts do JSON); padrão "json" usa o cliente supabase
+INGESTAO = os.environ.get("BI_INGESTAO", "json")
+
+# 🔹 Grão do cubo pré-agregado e dimensões indexadas para os filtros em cascata
+DIMENSOES_CUBO = DATASET.dimensoes_cubo
+DIMENSOES_FILTRO = DATASET.dimensoes_filtro
+
+# 🔹 Cubo semanal (montado só quando a visão semanal é aberta): filtros globais + semana ISO
+DIMENSOES_CUBO_SEMANAL = DIMENSOES_FILTRO + ["semana_iso", "ano_semana"]
+
+# 🔹 Árvores (DRE e matrizes) acima deste número de linhas abrem com a carga sob demanda ligada
+LIMITE_ARVORE_SOB_DEMANDA = 5000
+
+# 🔹 Limites do memo de metas (LRU): por número de combinações e por linhas guardadas
+MAX_ENTRADAS_MEMO_METAS = 256
+MAX_LINHAS_MEMO_METAS = 2_000_000
 
 st.set_page_config(layout="wide")
 
@@ -115,41 +277,77 @@ st.markdown("""
 # BUSCAR DADOS
 # ==============================
 
-response = supabase.table("vw_fcontas_geral_py").select("*").execute()
-df = pd.DataFrame(response.data)
-
-if "filial" in df.columns:
-    df = df.rename(columns={"filial": "filial"})
+@st.cache_resource
+def obter_cache_contas():
+    return criar_cache(
+        supabase,
+        DATASET,
+        PASTA_SNAPSHOTS,
+        ttl=TTL_CACHE_SEGUNDOS,
+        tamanho_pagina=TAMANHO_PAGINA,
+        max_workers=MAX_WORKERS_CARGA,
+        reconciliar_a_cada=RECONCILIAR_A_CADA_SEGUNDOS,
+        offline=MODO_OFFLINE,
+        agregacao=AGREGACAO,
+        tratamento=TRATAMENTO,
+        ingestao=INGESTAO,
+        cliente_http=conexao_http.cliente,
+        url=url,
+        chave_api=key
+    )
 
-# 🚫 Ocultar empresa 7 e status=cancelado
-df = df[df["id_empresa"] != 7]
-df = df[df["status"]!="Cancelado"]
 
-# ==============================
-# TRATAR VALORES NULOS
-# ==============================
+cache_contas = obter_cache_contas()
 
-df["razao"] = df.get("razao","Não informado")
-df["filial"] = df["filial"].fillna("Não informado")
-df["pcontas"] = df["pcontas"].fillna("Não informado")
-df["status"] = df["status"].fillna("Não informado")
+if st.button("🔄 Atualizar dados"):
+    cache_contas.invalidar()
 
-df['dt_vencimento'] = pd.to_datetime(df['dt_vencimento'], errors='coerce')
-df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-df = df.dropna(subset=['dt_vencimento','valor'])
-df['movimento'] = df['movimento'].str.strip().str.capitalize()
+snapshot, estado_cache = cache_contas.obter()
+df = snapshot.df
+tempos_carga = snapshot.tempos
 
+# 🔹 Barra fixa com data da carga e situação do cache
+data_atual = (
+    datetime.fromtimestamp(estado_cache.carregado_em).strftime("%d/%m/%Y %H:%M")
+    if estado_cache.carregado_em is not None else "—"
+)
+idade_min = int(estado_cache.idade // 60)
 
-meses = {1:"Janeiro",2:"Fevereiro",3:"Março",4:"Abril",5:"Maio",6:"Junho",
-         7:"Julho",8:"Agosto",9:"Setembro",10:"Outubro",11:"Novembro",12:"Dezembro"}
+st.markdown(f"""
+<div class="topbar">
+    <div style="display:flex; align-items:center; gap:15px;">
+        <img src="https://raw.githubusercontent.com/dataflowb2b-glitch/BI_PYTHON/main/LOGO%20NOVA%20DAS%20NOVAS.jpeg" width="140">
+        <div class="title">📊GESTÃO DE RESULTADO FINANCEIRO</div>
+    </div>
+    <div class="date">Atualizado em {data_atual}<span class="cache-info">cache {estado_cache.status} · {idade_min} min</span></div>
+</div>
+""", unsafe_allow_html=True)
 
-df['ano'] = df['dt_vencimento'].dt.year
-df['mes'] = df['dt_vencimento'].dt.month
-df['nome_mes'] = df['mes'].map(meses)
-df['mes_ano'] = df['dt_vencimento'].dt.to_period('M').astype(str)
+painel_carga = st.expander("⏱️ Tempo de carga dos dados")
 
-ordem_meses = ["Janeiro","Fevereiro","Março","Abril","Maio","Junho",
-               "Julho","Agosto","Setembro","Outubro","Novembro","Dezembro"]
+with painel_carga:
+    st.caption(
+        f"Carga {snapshot.modo} · {snapshot.linhas_recebidas} linhas recebidas · "
+        f"cache: {estado_cache.acertos} hit / {estado_cache.falhas} miss"
+    )
+    if estado_cache.erro is not None:
+        st.warning(f"Origem indisponível, usando snapshot local: {estado_cache.erro}")
+    if estado_cache.erro_snapshot is not None:
+        st.warning(f"Não foi possível gravar o snapshot local: {estado_cache.erro_snapshot}")
+    if tempos_carga is not None:
+        st.caption(
+            f"{len(tempos_carga)} página(s) · "
+            f"maior página {tempos_carga['segundos'].max():.2f}s"
+        )
+        st.dataframe(tempos_carga, width="stretch", hide_index=True)
+
+    estatisticas_http = conexao_http.estatisticas()
+    st.caption(
+        f"{' + '.join(sorted(estatisticas_http['protocolos'])) or 'HTTP'}: {estatisticas_http['requisicoes']} requisições · "
+        f"{estatisticas_http['conexoes']} conexões ({estatisticas_http['reaproveitamento']:.0%} reaproveitadas) · "
+        f"p50 {estatisticas_http['latencia_p50'] * 1000:.0f} ms / p95 {estatisticas_http['latencia_p95'] * 1000:.0f} ms · "
+        f"{estatisticas_http['retentativas']} retentativas"
+    )
 
 # ==============================
 # FILTROS
@@ -158,6 +356,81 @@ ordem_meses = ["Janeiro","Fevereiro","Março","Abril","Maio","Junho",
 # FILTROS CORPORATIVOS EM CASCATA
 # ==============================
 
+@st.cache_resource(max_entries=2)
+def obter_cubo(versao, _df):
+    return montar_cubo(_df, DIMENSOES_CUBO)
+
+
+@st.cache_resource(max_entries=2)
+def obter_indice_filtros(versao, _cubo):
+    return IndiceFiltros(_cubo, DIMENSOES_FILTRO)
+
+
+@st.cache_resource(max_entries=2)
+def obter_cubo_semanal(versao, _df):
+    cubo_semanal = montar_cubo(_df, DIMENSOES_CUBO_SEMANAL)
+    return cubo_semanal, IndiceFiltros(cubo_semanal, DIMENSOES_FILTRO)
+
+
+@st.cache_resource(max_entries=2)
+def obter_motor_duckdb(versao, _cubo):
+    return MotorDuckDB(_cubo)
+
+
+@st.cache_resource
+def obter_memo_metas():
+    return MemoMetas(max_entradas=MAX_ENTRADAS_MEMO_METAS, max_linhas=MAX_LINHAS_MEMO_METAS)
+
+
+def obter_meta(filtros, movimento, meses, grupos, coluna_total, coluna_meses, coluna_meta):
+    # 🔹 Matriz grupo x mês montada uma vez por (versão + filtros + grupos), em qualquer sessão;
+    # trocar a janela de meses só consulta as somas acumuladas
+    matriz = memo_metas.obter(
+        chave_meta(estado_cache.versao, filtros, movimento, grupos),
+        lambda: MatrizMensal(plano_filtros.frame(filtros, {"movimento": [movimento]}), grupos)
+    )
+    return matriz.meta(meses, coluna_total, coluna_meses, coluna_meta)
+
+
+def calcular_meta_vs_atual(df_meta, selecoes, chaves, coluna_meta, coluna_atual, **opcoes):
+    if motor_duckdb is None:
+        return meta_vs_atual(df_meta, plano_filtros.frame(*selecoes), chaves, coluna_meta, coluna_atual, **opcoes)
+
+    resultado = motor_duckdb.meta_vs_atual(df_meta, selecoes, chaves, coluna_meta, coluna_atual, **opcoes)
+
+    if CONFERIR_MOTOR:
+        esperado = meta_vs_atual(df_meta, plano_filtros.frame(*selecoes), chaves, coluna_meta, coluna_atual, **opcoes)
+        diferenca = diferenca_resultados(
+            resultado, esperado, rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA
+        )
+        if diferenca is not None:
+            # 🔹 Detalhe da divergência vai para o log; na tela, só o aviso
+            log.warning("DuckDB divergiu do pandas (%s x %s): %s", coluna_meta, coluna_atual, diferenca)
+            st.warning("DuckDB divergiu do pandas; usando o resultado do pandas.")
+            return esperado
+
+    return resultado
+
+
+# 🔹 Cubo e índice de bitmaps montados uma vez por versão do dataset;
+# filtros e visões trabalham sobre os grupos do cubo, não sobre os lançamentos
+cubo = obter_cubo(estado_cache.versao, df)
+indice = obter_indice_filtros(estado_cache.versao, cubo)
+memo_metas = obter_memo_metas()
+motor_duckdb = obter_motor_duckdb(estado_cache.versao, cubo) if MOTOR == "duckdb" else None
+
+# 🔹 Cada combinação de filtros pedida pelos filtros e abas vira máscara/linhas uma única vez
+# neste rerun; sem filtro nenhum, o frame devolvido é o próprio cubo compartilhado (sem cópia)
+plano_filtros = PlanoFiltros(indice, cubo)
+
+with painel_carga:
+    estatisticas_memo = memo_metas.estatisticas()
+    st.caption(
+        f"Memo de metas: {estatisticas_memo['entradas']} entradas · {estatisticas_memo['linhas']} linhas · "
+        f"{estatisticas_memo['acertos']} hit / {estatisticas_memo['falhas']} miss "
+        f"({estatisticas_memo['taxa_acerto']:.0%}) · {estatisticas_memo['descartes']} descartes"
+    )
+
 st.subheader("📋 Filtros")
 
 # 🔹 Filtros de data primeiro
@@ -165,13 +438,13 @@ col_data1, col_data2 = st.columns(2)
 
 ano_sel = col_data1.multiselect(
     "Ano",
-    sorted(df["ano"].dropna().unique()),
+    indice.opcoes("ano"),
     key="ano"
 )
 
 mes_sel = col_data2.multiselect(
     "Mês",
-    sorted(df["nome_mes"].dropna().unique(), key=lambda x: ordem_meses.index(x)),
+    sorted(indice.opcoes("nome_mes"), key=lambda x: ordem_meses.index(x)),
     key="mes"
 )
 
@@ -179,13 +452,7 @@ mes_sel = col_data2.multiselect(
 # BASE COM FILTRO DE DATA
 # ------------------------------
 
-df_base = df.copy()
-
-if ano_sel:
-    df_base = df_base[df_base["ano"].isin(ano_sel)]
-
-if mes_sel:
-    df_base = df_base[df_base["nome_mes"].isin(mes_sel)]
+mascara_base = plano_filtros.mascara({"ano": ano_sel, "nome_mes": mes_sel})
 
 # ==============================
 # RAZÃO
@@ -193,7 +460,7 @@ if mes_sel:
 
 col_f1, col_f2, col_f3, col_f4, col_f5, col_f6 = st.columns(6)
 
-razao_options = sorted(df_base["razao"].dropna().unique())
+razao_options = indice.opcoes("razao", mascara_base)
 
 razao_sel = col_f1.multiselect(
     "Razão",
@@ -205,12 +472,9 @@ razao_sel = col_f1.multiselect(
 # FILIAL (DEPENDENTE DA RAZÃO)
 # ==============================
 
-df_filial = df_base.copy()
-
-if razao_sel:
-    df_filial = df_filial[df_filial["razao"].isin(razao_sel)]
+mascara_filial = plano_filtros.mascara({"ano": ano_sel, "nome_mes": mes_sel, "razao": razao_sel})
 
-filial_options = sorted(df_filial["filial"].dropna().unique())
+filial_options = indice.opcoes("filial", mascara_filial)
 
 filial_sel = col_f2.multiselect(
     "Filial",
@@ -224,18 +488,18 @@ filial_sel = col_f2.multiselect(
 
 movimento_sel = col_f3.multiselect(
     "Movimento",
-    sorted(df_filial["movimento"].dropna().unique()),
+    indice.opcoes("movimento", mascara_filial),
     key="movimento"
 )
 
 status_sel = col_f4.multiselect(
     "Status",
-    sorted(df_filial["status"].dropna().unique()),
+    indice.opcoes("status", mascara_filial),
     key="status"
 )
 pcontas_sel = col_f5.multiselect(
     "PContas",
-    sorted(df_filial["pcontas"].dropna().unique()),
+    indice.opcoes("pcontas", mascara_filial),
     key="pcontas"
 )
 
@@ -243,20 +507,18 @@ pcontas_sel = col_f5.multiselect(
 # APLICAR FILTROS
 # ==============================
 
-df_filtrado = df.copy()
-for key, sel, col in zip(
-    ["ano","mes","razao","filial","movimento","status","pcontas"],
-    [ano_sel,mes_sel,razao_sel,filial_sel,movimento_sel,status_sel,pcontas_sel],
-    ["ano","nome_mes","razao","filial","movimento","status","pcontas"]
-):
-    if sel:
-        df_filtrado = df_filtrado[df_filtrado[col].isin(sel)]
+selecao_global = dict(zip(
+    ["ano","nome_mes","razao","filial","movimento","status","pcontas"],
+    [ano_sel,mes_sel,razao_sel,filial_sel,movimento_sel,status_sel,pcontas_sel]
+))
+
+cubo_filtrado = plano_filtros.frame(selecao_global)
 
 # ==============================
 # CARDS
 # ==============================
 
-totais_filtrados = df_filtrado.groupby('movimento')['valor'].sum()
+totais_filtrados = cubo_filtrado.groupby('movimento', observed=True)['valor'].sum()
 receita_filtrada = totais_filtrados.get('Receita',0)
 despesa_filtrada = totais_filtrados.get('Despesa',0)
 resultado_filtrado = receita_filtrada - despesa_filtrada
@@ -274,183 +536,231 @@ col3.markdown(f"""<div class="card"><div class="card-title">📊 Resultado</div>
 # TABS
 # ==============================
 
-tab1, tab2, tab3,tab4,tab5 = st.tabs(["📊 Dashboard Principal","📈 Média de Despesas","📊 DRE Mensal","📊 Matriz de Despesas (Grupo + Razão + Pcontas + Filial)","💰 Meta de Faturamento"])
+# 🔹 Navegação por rádio: só a aba escolhida executa seus cálculos a cada rerun
+NOMES_ABAS = ["📊 Dashboard Principal","📈 Média de Despesas","📊 DRE Mensal","📊 Matriz de Despesas (Grupo + Razão + Pcontas + Filial)","💰 Meta de Faturamento"]
+
+manter_estado_widgets([
+    "semanal_ativo", "detalhe_ativo", "detalhe_busca", "detalhe_ordem", "detalhe_decrescente", "detalhe_tamanho", "detalhe_pagina",
+    "mes_ano_media", "mes_ano_media_tab4", "mes_ano_media_tab5",
+    "dre_sob_demanda", "matriz_despesas_sob_demanda", "matriz_faturamento_sob_demanda",
+])
+
+aba_ativa = st.radio(
+    "Aba",
+    NOMES_ABAS,
+    horizontal=True,
+    key="aba",
+    label_visibility="collapsed"
+)
 
-with tab1:
+def aba_dashboard():
     with st.expander("📅 Valores por Mês/Ano"):
-        df_mes_ano = df_filtrado.groupby(['mes_ano', 'movimento'])['valor'].sum().unstack(fill_value=0)
+        df_mes_ano = cubo_filtrado.groupby(['mes_ano', 'movimento'], observed=True)['valor'].sum().unstack(fill_value=0)
         df_mes_ano['Receita'] = df_mes_ano.get('Receita', 0)
         df_mes_ano['Despesa'] = df_mes_ano.get('Despesa', 0)
         df_mes_ano['Resultado'] = df_mes_ano['Receita'] - df_mes_ano['Despesa']
 
 
-        def colorir_valores(val, coluna):
-            if coluna == "Receita":
-                return "color: green" if val > 0 else "color: black"
-            elif coluna == "Despesa":
-                return "color: red" if val < 0 else "color: black"
-            elif coluna == "Resultado":
-                return "color: green" if val > 0 else "color: red"
-            return ""
-
+        cores_mes_ano = {
+            "Receita": {"positivo": "color: green", "negativo": "color: black", "zero": "color: black", "nulo": "color: black"},
+            "Despesa": {"positivo": "color: black", "negativo": "color: red", "zero": "color: black", "nulo": "color: black"},
+            "Resultado": {"positivo": "color: green", "negativo": "color: red", "zero": "color: red", "nulo": "color: red"},
+        }
 
-        df_estilizado = df_mes_ano.style
-        for col in df_mes_ano.columns:
-            df_estilizado = df_estilizado.map(
-                lambda v, c=col: colorir_valores(v, c),
-                subset=[col]
-            )
+        df_estilizado = df_mes_ano.style.apply(
+            estilos_por_sinal,
+            axis=None,
+            regras=cores_mes_ano
+        )
 
-        # Formatar para Real
-        df_estilizado = df_estilizado.format(formatar_real)
+        # Formatar para Real (textos calculados de uma vez para a tabela toda)
+        df_estilizado = df_estilizado.format(
+            formatador_reais(*(df_mes_ano[col] for col in df_mes_ano.columns))
+        )
 
         st.dataframe(df_estilizado, use_container_width=True)
 
-    with st.expander("📂 Visão Detalhada"):
-        df_detalhe = df_filtrado.groupby(
-            ['razao', 'filial', 'status','ano', 'nome_mes', 'pcontas', 'movimento'],
-            dropna=False
-        )['valor'].sum().unstack(fill_value=0).reset_index()
-
-        # Garantir que as colunas existam
-        for col in ["Receita", "Despesa"]:
-            if col not in df_detalhe.columns:
-                df_detalhe[col] = 0
-
-        # Criar Resultado (opcional, mas recomendo manter padrão)
-        df_detalhe["Resultado"] = df_detalhe["Receita"] - df_detalhe["Despesa"]
-
-
-        def cor_texto(valor, coluna):
-            if coluna == "Receita":
-                return "color: green;" if valor > 0 else ""
-            elif coluna == "Despesa":
-                return "color: red;" if valor < 0 else ""
-            elif coluna == "Resultado":
-                if valor > 0:
-                    return "color: green; font-weight: bold;"
-                elif valor < 0:
-                    return "color: red; font-weight: bold;"
-            return ""
-
-
-        styled = df_detalhe.style
-
-        for col in ["Receita", "Despesa", "Resultado"]:
-            styled = styled.map(
-                lambda v, c=col: cor_texto(v, c),
-                subset=[col]
+    with st.expander("🗓️ Valores por Semana (ISO)"):
+
+        # 🔹 Cubo semanal só é montado (uma vez por versão) quando a visão é pedida
+        carregar_semanal = st.toggle(
+            "Carregar visão semanal",
+            value=False,
+            key="semanal_ativo"
+        )
+
+        if carregar_semanal:
+            cubo_semanal, indice_semanal = obter_cubo_semanal(estado_cache.versao, df)
+            base_semanal = PlanoFiltros(indice_semanal, cubo_semanal).frame(selecao_global)
+
+            df_semana = base_semanal.groupby(['ano_semana', 'movimento'], observed=True)['valor'].sum().unstack(fill_value=0)
+            df_semana['Receita'] = df_semana.get('Receita', 0)
+            df_semana['Despesa'] = df_semana.get('Despesa', 0)
+            df_semana['Resultado'] = df_semana['Receita'] - df_semana['Despesa']
+
+            df_semana_estilizado = df_semana.style.apply(
+                estilos_por_sinal,
+                axis=None,
+                regras=cores_mes_ano
+            ).format(
+                formatador_reais(*(df_semana[col] for col in df_semana.columns))
             )
 
-        styled = styled.format({
-            "Receita": formatar_real,
-            "Despesa": formatar_real,
-            "Resultado": formatar_real
-        })
+            st.dataframe(df_semana_estilizado, use_container_width=True)
 
-        st.dataframe(styled, use_container_width=True)
+    with st.expander("📂 Visão Detalhada"):
 
+        # 🔹 Só agrega, ordena e estiliza quando o usuário pede a tabela
+        carregar_detalhe = st.toggle(
+            "Carregar visão detalhada",
+            value=False,
+            key="detalhe_ativo"
+        )
 
-# ==============================
-# COLUNA ANO_SEMANA
-# ==============================
+        if carregar_detalhe:
+            df_detalhe = cubo_filtrado.groupby(
+                ['razao', 'filial', 'status','ano', 'nome_mes', 'pcontas', 'movimento'],
+                dropna=False,
+                observed=True
+            )['valor'].sum().unstack(fill_value=0).reset_index()
 
-df["ano_semana"] = (
-    df["dt_vencimento"].dt.year.astype(str)
-    + "-S"
-    + df["dt_vencimento"].dt.isocalendar().week.astype(str).str.zfill(2)
-)
+            # Garantir que as colunas existam
+            for col in ["Receita", "Despesa"]:
+                if col not in df_detalhe.columns:
+                    df_detalhe[col] = 0
 
-with tab2:
+            # Criar Resultado (opcional, mas recomendo manter padrão)
+            df_detalhe["Resultado"] = df_detalhe["Receita"] - df_detalhe["Despesa"]
 
-    st.subheader("📊 Meta de Despesas + Comparativo Atual")
+            # ==============================
+            # BUSCA / ORDENAÇÃO / PÁGINA
+            # ==============================
 
-    mes_ano_tab2 = st.multiselect(
-        "Selecione os Mês/Ano para cálculo da média",
-        sorted(df["mes_ano"].dropna().unique()),
-        key="mes_ano_media"
-    )
+            c_busca, c_ordem, c_sentido, c_tamanho = st.columns([3, 2, 1, 1])
 
-    # ==============================
-    # DESPESA ATUAL
-    # ==============================
+            busca_detalhe = c_busca.text_input("🔎 Buscar", key="detalhe_busca")
 
-    df_despesa_topo = df_filtrado[
-        df_filtrado["movimento"] == "Despesa"
-    ].copy()
+            ordenar_detalhe = c_ordem.selectbox(
+                "Ordenar por",
+                list(df_detalhe.columns),
+                index=None,
+                placeholder="Ordem padrão",
+                key="detalhe_ordem"
+            )
 
-    despesa_atual_group = df_despesa_topo.groupby(
-        ['razao','filial','status','pcontas']
-    )['valor'].sum().reset_index()
+            decrescente_detalhe = c_sentido.toggle("Decrescente", key="detalhe_decrescente")
 
-    despesa_atual_group.rename(
-        columns={"valor": "Despesa_Atual"},
-        inplace=True
-    )
+            st.session_state.setdefault("detalhe_tamanho", 100)
+            tamanho_pagina_detalhe = c_tamanho.selectbox(
+                "Linhas por página",
+                [50, 100, 250, 500, 1000],
+                key="detalhe_tamanho"
+            )
 
-    # ==============================
-    # BASE MÉDIA
-    # ==============================
+            df_detalhe = filtrar_texto(
+                df_detalhe,
+                busca_detalhe,
+                ['razao', 'filial', 'status', 'nome_mes', 'pcontas']
+            )
 
-    df_base_media = df.copy()
+            total_paginas_detalhe = max(1, -(-len(df_detalhe) // tamanho_pagina_detalhe))
 
-    for sel, col in zip(
-        [razao_sel, filial_sel, movimento_sel, pcontas_sel],
-        ["razao","filial","movimento","status","pcontas"]
-    ):
-        if sel:
-            df_base_media = df_base_media[df_base_media[col].isin(sel)]
+            # 🔹 Filtro/busca podem encolher o total: ajusta a página antes do widget
+            if st.session_state.get("detalhe_pagina", 1) > total_paginas_detalhe:
+                st.session_state["detalhe_pagina"] = total_paginas_detalhe
 
-    df_media_despesas = df_base_media[
-        df_base_media["movimento"] == "Despesa"
-    ].copy()
+            pagina_detalhe = st.number_input(
+                "Página",
+                min_value=1,
+                max_value=total_paginas_detalhe,
+                step=1,
+                key="detalhe_pagina"
+            )
 
-    if mes_ano_tab2:
-        df_media_despesas = df_media_despesas[
-            df_media_despesas["mes_ano"].isin(mes_ano_tab2)
-        ]
+            df_pagina, pagina_detalhe, total_paginas_detalhe = fatiar_pagina(
+                df_detalhe,
+                pagina_detalhe,
+                tamanho_pagina_detalhe,
+                ordenar_por=ordenar_detalhe,
+                decrescente=decrescente_detalhe
+            )
 
-    if not df_media_despesas.empty:
+            inicio_pagina = (pagina_detalhe - 1) * tamanho_pagina_detalhe
+            st.caption(
+                f"Linhas {inicio_pagina + 1 if len(df_pagina) else 0}–{inicio_pagina + len(df_pagina)} "
+                f"de {len(df_detalhe)} · página {pagina_detalhe} de {total_paginas_detalhe}"
+            )
 
-        agrupado = df_media_despesas.groupby(
-            ['razao','filial','status','movimento','pcontas']
-        )
+            cores_detalhe = {
+                "Receita": {"positivo": "color: green;"},
+                "Despesa": {"negativo": "color: red;"},
+                "Resultado": {"positivo": "color: green; font-weight: bold;", "negativo": "color: red; font-weight: bold;"},
+            }
 
-        df_media = agrupado.agg(
-            Total_Despesa=('valor','sum'),
-            Qtd_Meses=('mes_ano','nunique')
-        ).reset_index()
+            styled = df_pagina.style.apply(
+                estilos_por_sinal,
+                axis=None,
+                regras=cores_detalhe
+            )
 
-        df_media["Meta_Despesa"] = (
-            df_media["Total_Despesa"] / df_media["Qtd_Meses"]
-        )
+            formatar_detalhe = formatador_reais(
+                df_pagina["Receita"], df_pagina["Despesa"], df_pagina["Resultado"]
+            )
 
-        # ==============================
-        # MERGE
-        # ==============================
+            styled = styled.format({
+                "Receita": formatar_detalhe,
+                "Despesa": formatar_detalhe,
+                "Resultado": formatar_detalhe
+            })
+
+            st.dataframe(styled, use_container_width=True)
 
-        df_final = df_media.merge(
-            despesa_atual_group,
-            on=['razao','filial','status','pcontas'],
-            how="outer"
-        )
 
-        df_final["Despesa_Atual"] = df_final["Despesa_Atual"].fillna(0)
+# 🔹 Fragmento: mexer no Mês/Ano da média reexecuta só esta aba, sobre o cubo_filtrado da última execução completa
+@st.fragment
+def aba_media_despesas():
+
+    st.subheader("📊 Meta de Despesas + Comparativo Atual")
+
+    opcoes_mes_ano = sorted(cubo["mes_ano"].dropna().unique())
+
+    botoes_janela_meses("mes_ano_media", opcoes_mes_ano)
+
+    mes_ano_tab2 = st.multiselect(
+        "Selecione os Mês/Ano para cálculo da média",
+        opcoes_mes_ano,
+        key="mes_ano_media"
+    )
+
+    # ==============================
+    # BASE MÉDIA
+    # ==============================
+
+    df_media = obter_meta(
+        dict(zip(
+            ["razao","filial","movimento","status","pcontas"],
+            [razao_sel, filial_sel, movimento_sel, pcontas_sel]
+        )),
+        "Despesa",
+        mes_ano_tab2,
+        ['razao','filial','status','movimento','pcontas'],
+        "Total_Despesa",
+        "Qtd_Meses",
+        "Meta_Despesa"
+    )
+
+    if not df_media.empty:
 
         # ==============================
-        # DIFERENÇA E VARIAÇÃO
+        # DESPESA ATUAL, MERGE, DIFERENÇA E VARIAÇÃO
         # ==============================
 
-        df_final["Diferenca_R$"] = (
-            df_final["Despesa_Atual"] - df_final["Meta_Despesa"]
-        )
-
-        df_final["Variação_%"] = df_final.apply(
-            lambda row: (
-                ((row["Despesa_Atual"] - row["Meta_Despesa"]) / row["Meta_Despesa"]) * 100
-                if row["Meta_Despesa"] != 0 else 0
-            ),
-            axis=1
+        df_final = calcular_meta_vs_atual(
+            df_media,
+            [selecao_global, {"movimento": ["Despesa"]}],
+            ['razao','filial','status','pcontas'],
+            "Meta_Despesa",
+            "Despesa_Atual"
         )
 
         df_exibir = df_final.drop(columns=["Total_Despesa", "Qtd_Meses"])
@@ -472,44 +782,32 @@ with tab2:
         # ESTILIZAÇÃO
         # ==============================
 
-        def cor_variacao(v):
-            if v > 0:
-                return "color: #dc2626; font-weight: bold;"
-            elif v < 0:
-                return "color: #16a34a; font-weight: bold;"
-            elif v == 0:
-                return "color: #e8a507; font-weight: bold;"
-            return ""
-
-        def cor_diferenca(v):
-            if v > 0:
-                return "color: #dc2626; font-weight: bold;"
-            elif v < 0:
-                return "color: #16a34a; font-weight: bold;"
-            elif v == 0:
-                return "color: #e8a507; font-weight: bold;"
-            return ""
-
-        def destacar_total(row):
-            if row["razao"] == "TOTAL GERAL":
-                return ["font-weight: bold; background-color: #f3f4f6"] * len(row)
-            return [""] * len(row)
-
-        styled = df_exibir.style.map(
-            cor_variacao,
-            subset=["Variação_%"]
-        ).map(
-            cor_diferenca,
-            subset=["Diferenca_R$"]
+        cor_sinal = {
+            "positivo": "color: #dc2626; font-weight: bold;",
+            "negativo": "color: #16a34a; font-weight: bold;",
+            "zero": "color: #e8a507; font-weight: bold;",
+        }
+
+        linha_total = (
+            df_exibir["razao"] == "TOTAL GERAL",
+            "font-weight: bold; background-color: #f3f4f6"
+        )
+
+        formatar_meta = formatador_reais(
+            df_exibir["Meta_Despesa"], df_exibir["Despesa_Atual"], df_exibir["Diferenca_R$"]
+        )
+
+        styled = df_exibir.style.apply(
+            estilos_por_sinal,
+            axis=None,
+            regras={"Variação_%": cor_sinal, "Diferenca_R$": cor_sinal},
+            destaque=linha_total
         ).format({
-            "Meta_Despesa": formatar_real,
-            "Despesa_Atual": formatar_real,
-            "Diferenca_R$": formatar_real,
+            "Meta_Despesa": formatar_meta,
+            "Despesa_Atual": formatar_meta,
+            "Diferenca_R$": formatar_meta,
             "Variação_%": "{:.2f}%"
-        }).apply(
-            destacar_total,
-            axis=1
-        )
+        })
 
         # ==========================================
         # 🔹 RESUMO GERAL ACIMA DA TABELA
@@ -541,7 +839,7 @@ with tab2:
     else:
         st.warning("Nenhuma despesa encontrada para os filtros selecionados.")
 
-with tab3:
+def aba_dre():
 
     st.subheader("📊 DRE Hierárquica (Razão ➝ Grupo ➝ Filial)")
 
@@ -549,30 +847,31 @@ with tab3:
     # GARANTIR PADRONIZAÇÃO
     # ==============================
 
-    df_filtrado["movimento"] = df_filtrado["movimento"].str.strip().str.title()
+    cubo_dre = cubo_filtrado.assign(
+        movimento=cubo_filtrado["movimento"].str.strip().str.title()
+    )
 
     # ==============================
     # PIVOT BASE
     # ==============================
 
     df_pivot = pd.pivot_table(
-        df_filtrado,
+        cubo_dre,
         index=["razao", "filial", "status", "movimento"],
         columns=["ano", "nome_mes"],
         values="valor",
         aggfunc="sum",
-        fill_value=0
+        fill_value=0,
+        observed=True
     )
 
     if df_pivot.empty:
         st.warning("Sem dados para os filtros selecionados.")
-        st.stop()
+        return
 
     meses_existentes = sorted(df_pivot.columns)
     df_pivot = df_pivot[meses_existentes]
 
-    linhas = []
-
     # ==============================
     # ORDEM CORRETA DOS MESES
     # ==============================
@@ -583,7 +882,7 @@ with tab3:
         "Setembro", "Outubro", "Novembro", "Dezembro"
     ]
 
-    anos_existentes = sorted(df_filtrado["ano"].dropna().unique())
+    anos_existentes = sorted(cubo_dre["ano"].dropna().unique())
 
     colunas_ordenadas = []
 
@@ -599,47 +898,25 @@ with tab3:
 
     meses_existentes = df_pivot.columns.tolist()
 
-    linhas = []
     # ==============================
     # HIERARQUIA
     # ==============================
 
-    for razao, df_razao in df_pivot.groupby(level="razao"):
-
-        receita_razao = df_razao[df_razao.index.get_level_values("movimento") == "Receita"].sum()
-        resultado_razao = receita_razao
-
-        row_razao = {mes: float(resultado_razao.get(mes, 0)) for mes in meses_existentes}
-        row_razao["TOTAL"] = float(resultado_razao.sum())
-        row_razao["path"] = [razao]
-        linhas.append(row_razao)
-
-        # ----------------------------
-        # FILIAL
-        # ----------------------------
-
-        for filial, df_filial in df_razao.groupby(level="filial"):
-
-            receita = df_filial[df_filial.index.get_level_values("movimento") == "Receita"].sum()
-            resultado = receita
-
-            row_filial = {mes: float(resultado.get(mes, 0)) for mes in meses_existentes}
-            row_filial["TOTAL"] = float(resultado.sum())
-            row_filial["path"] = [razao, filial]
-            linhas.append(row_filial)
-
-            # ----------------------------
-            # MOVIMENTO
-            # ----------------------------
-
-            for movimento, df_mov in df_filial.groupby(level="movimento"):
+    base_dre = df_pivot.reset_index()
+    base_dre["TOTAL"] = base_dre[meses_existentes].sum(axis=1)
 
-                row_det = {mes: float(df_mov[mes].sum()) for mes in meses_existentes}
-                row_det["TOTAL"] = float(df_mov.sum().sum())
-                row_det["path"] = [razao, filial, movimento]
-                linhas.append(row_det)
+    # 🔹 Razão e filial mostram só a receita; o nível movimento mostra cada movimento
+    somente_receita = {
+        col: ("soma_se", col, "movimento", "Receita")
+        for col in meses_existentes + ["TOTAL"]
+    }
 
-    dre_df = pd.DataFrame(linhas)
+    dre_df = montar_arvore(
+        base_dre,
+        ["razao", "filial", "movimento"],
+        {col: ("soma", col) for col in meses_existentes + ["TOTAL"]},
+        agregacoes_por_nivel={0: somente_receita, 1: somente_receita}
+    )
 
     # ==============================
     # ESTILO DE COR
@@ -666,44 +943,32 @@ with tab3:
     # CONFIGURAÇÃO GRID
     # ==============================
 
-    gb = GridOptionsBuilder.from_dataframe(dre_df)
+    def configurar_colunas_dre(gb):
 
-    gb.configure_column("path", hide=True)
+        gb.configure_column("path", hide=True)
 
-    for col in meses_existentes + ["TOTAL"]:
-        gb.configure_column(
-            col,
-            type=["numericColumn"],
-            valueFormatter="x.toLocaleString('pt-BR', {style:'currency', currency:'BRL'})",
-            cellStyle=cell_style
-        )
+        for col in meses_existentes + ["TOTAL"]:
+            gb.configure_column(
+                col,
+                type=["numericColumn"],
+                valueFormatter="x.toLocaleString('pt-BR', {style:'currency', currency:'BRL'})",
+                cellStyle=cell_style
+            )
 
-    gb.configure_grid_options(
-        treeData=True,
-        animateRows=True,
-        groupDefaultExpanded=0,
-        getDataPath=JsCode("function(data) { return data.path; }")
-    )
+    exibir_arvore_aggrid(dre_df, "dre", configurar_colunas_dre)
 
-    gridOptions = gb.build()
+@st.fragment
+def aba_matriz_despesas():
 
-    AgGrid(
-        dre_df,
-        gridOptions=gridOptions,
-        enable_enterprise_modules=True,
-        fit_columns_on_grid_load=True,
-        theme="streamlit",
-        allow_unsafe_jscode=True,
-        height=650
-    )
+    st.subheader("📊 Matriz de Despesas (Pcontas ➝ Razão ➝ Filial)")
 
-with tab4:
+    opcoes_mes_ano = sorted(cubo["mes_ano"].dropna().unique())
 
-    st.subheader("📊 Matriz de Despesas (Pcontas ➝ Razão ➝ Filial)")
+    botoes_janela_meses("mes_ano_media_tab4", opcoes_mes_ano)
 
     mes_ano_tab4 = st.multiselect(
         "Selecione os Mês/Ano para cálculo da média",
-        sorted(df["mes_ano"].dropna().unique()),
+        opcoes_mes_ano,
         key="mes_ano_media_tab4"
     )
 
@@ -711,114 +976,28 @@ with tab4:
     # BASE META (IGNORA FILTRO DE MÊS)
     # ==============================
 
-    df_meta_base = df.copy()
-
-    if razao_sel:
-        df_meta_base = df_meta_base[df_meta_base["razao"].isin(razao_sel)]
-
-    if filial_sel:
-        df_meta_base = df_meta_base[df_meta_base["filial"].isin(filial_sel)]
-
-    if status_sel:
-        df_meta_base = df_meta_base[df_meta_base["status"].isin(status_sel)]
-
-    if pcontas_sel:
-        df_meta_base = df_meta_base[df_meta_base["pcontas"].isin(pcontas_sel)]
-
-    df_meta_base = df_meta_base[df_meta_base["movimento"] == "Despesa"]
-
-    # ==============================
-    # FILTRO MESES MÉDIA
-    # ==============================
-
-    if mes_ano_tab4:
-        df_meta_base = df_meta_base[
-            df_meta_base["mes_ano"].isin(mes_ano_tab4)
-        ]
-
-    # ==============================
-    # CALCULO META
-    # ==============================
-
-    df_meta = (
-        df_meta_base
-        .groupby(["pcontas","razao","filial"])
-        .agg(
-            Total_Despesa=("valor","sum"),
-            Meses=("mes_ano","nunique")
-        )
-        .reset_index()
-    )
-
-    df_meta["Meta_Despesa"] = (
-        df_meta["Total_Despesa"] / df_meta["Meses"]
-    )
-
-    # ==============================
-    # DESPESA ATUAL
-    # ==============================
-
-    df_atual = df_filtrado.copy()
-
-    df_atual = df_atual[
-        df_atual["movimento"] == "Despesa"
-    ]
-
-    df_atual = (
-        df_atual
-        .groupby(["pcontas", "razao", "filial"], as_index=False)
-        ["valor"]
-        .sum()
-    )
-
-    df_atual.rename(
-        columns={"valor": "Despesa_Atual"},
-        inplace=True
-    )
-
-    # ==============================
-    # STATUS DA DESPESA
-    # ==============================
-
-    df_status = (
-        df_filtrado[df_filtrado["movimento"] == "Despesa"]
-        .groupby(["pcontas","razao","filial"])["status"]
-        .first()
-        .reset_index()
+    df_meta = obter_meta(
+        {"razao": razao_sel, "filial": filial_sel, "status": status_sel, "pcontas": pcontas_sel},
+        "Despesa",
+        mes_ano_tab4,
+        ["pcontas","razao","filial"],
+        "Total_Despesa",
+        "Meses",
+        "Meta_Despesa"
     )
 
     # ==============================
-    # MERGE
+    # DESPESA ATUAL, STATUS, MERGE E DIFERENÇA
     # ==============================
 
-    df_final = df_meta.merge(
-        df_atual,
-        on=["pcontas","razao","filial"],
-        how="outer"
-    )
-
-    df_final = df_final.merge(
-        df_status,
-        on=["pcontas","razao","filial"],
-        how="left"
-    )
-
-    df_final["Despesa_Atual"] = df_final["Despesa_Atual"].fillna(0)
-    df_final["Meta_Despesa"] = df_final["Meta_Despesa"].fillna(0)
-
-    # ==============================
-    # DIFERENÇA
-    # ==============================
-
-    df_final["Diferenca_R$"] = (
-        df_final["Despesa_Atual"] - df_final["Meta_Despesa"]
-    )
-
-    df_final["Variação_%"] = df_final.apply(
-        lambda row:
-        ((row["Despesa_Atual"] - row["Meta_Despesa"]) / row["Meta_Despesa"] * 100)
-        if row["Meta_Despesa"] != 0 else 0,
-        axis=1
+    df_final = calcular_meta_vs_atual(
+        df_meta,
+        [selecao_global, {"movimento": ["Despesa"]}],
+        ["pcontas","razao","filial"],
+        "Meta_Despesa",
+        "Despesa_Atual",
+        preencher_meta=True,
+        status=True
     )
 
     # ==============================
@@ -850,42 +1029,18 @@ with tab4:
     # MATRIZ HIERÁRQUICA
     # ==============================
 
-    linhas = []
-
-    for pcontas, df_pc in df_final.groupby("pcontas"):
-
-        linhas.append({
-            "Status":"",
-            "Meta_Despesa": df_pc["Meta_Despesa"].sum(),
-            "Despesa_Atual": df_pc["Despesa_Atual"].sum(),
-            "Diferenca_R$": df_pc["Diferenca_R$"].sum(),
-            "Variação_%": df_pc["Variação_%"].mean(),
-            "path":[pcontas]
-        })
-
-        for razao, df_r in df_pc.groupby("razao"):
-
-            linhas.append({
-                "Status":"",
-                "Meta_Despesa": df_r["Meta_Despesa"].sum(),
-                "Despesa_Atual": df_r["Despesa_Atual"].sum(),
-                "Diferenca_R$": df_r["Diferenca_R$"].sum(),
-                "Variação_%": df_r["Variação_%"].mean(),
-                "path":[pcontas,razao]
-            })
-
-            for filial, df_f in df_r.groupby("filial"):
-
-                linhas.append({
-                    "Status": df_f["status"].iloc[0] if not df_f.empty else "",
-                    "Meta_Despesa": df_f["Meta_Despesa"].sum(),
-                    "Despesa_Atual": df_f["Despesa_Atual"].sum(),
-                    "Diferenca_R$": df_f["Diferenca_R$"].sum(),
-                    "Variação_%": df_f["Variação_%"].mean(),
-                    "path":[pcontas,razao,filial]
-                })
-
-    matriz_df = pd.DataFrame(linhas)
+    matriz_df = montar_arvore(
+        df_final,
+        ["pcontas", "razao", "filial"],
+        {
+            "Status": ("fixo", ""),
+            "Meta_Despesa": ("soma", "Meta_Despesa"),
+            "Despesa_Atual": ("soma", "Despesa_Atual"),
+            "Diferenca_R$": ("soma", "Diferenca_R$"),
+            "Variação_%": ("media", "Variação_%"),
+        },
+        agregacoes_por_nivel={2: {"Status": ("primeiro", "status")}}
+    )
 
     # ==============================
     # AGGRID
@@ -937,156 +1092,76 @@ with tab4:
     }
     """)
 
-    gb = GridOptionsBuilder.from_dataframe(matriz_df)
+    def configurar_colunas_despesas(gb):
 
-    gb.configure_column("path", hide=True)
-
-    gb.configure_column(
-        "Status",
-        header_name="Status",
-        width=120,
-        cellStyle=status_style
-    )
-
-    for col in ["Meta_Despesa","Despesa_Atual","Diferenca_R$","Variação_%"]:
+        gb.configure_column("path", hide=True)
 
         gb.configure_column(
-            col,
-            type=["numericColumn"],
-            valueFormatter=(
-                "x.toLocaleString('pt-BR',{style:'currency',currency:'BRL'})"
-                if col!="Variação_%"
-                else "x.toFixed(2)+'%'"
-            ),
-            cellStyle=cell_style
+            "Status",
+            header_name="Status",
+            width=120,
+            cellStyle=status_style
         )
 
-    gb.configure_grid_options(
-        treeData=True,
-        animateRows=True,
-        groupDefaultExpanded=0,
-        getDataPath=JsCode("function(data){return data.path;}")
-    )
+        for col in ["Meta_Despesa","Despesa_Atual","Diferenca_R$","Variação_%"]:
 
-    AgGrid(
-        matriz_df,
-        gridOptions=gb.build(),
-        enable_enterprise_modules=True,
-        fit_columns_on_grid_load=True,
-        theme="streamlit",
-        allow_unsafe_jscode=True,
-        height=650
-    )
+            gb.configure_column(
+                col,
+                type=["numericColumn"],
+                valueFormatter=(
+                    "x.toLocaleString('pt-BR',{style:'currency',currency:'BRL'})"
+                    if col!="Variação_%"
+                    else "x.toFixed(2)+'%'"
+                ),
+                cellStyle=cell_style
+            )
 
+    exibir_arvore_aggrid(matriz_df, "matriz_despesas", configurar_colunas_despesas, escopo_rerun="fragment")
 
-with tab5:
+
+@st.fragment
+def aba_meta_faturamento():
 
     st.subheader("💰 Matriz de Faturamento (Grupo ➝ Pcontas ➝ Filial)")
 
+    opcoes_mes_ano = sorted(cubo["mes_ano"].dropna().unique())
+
+    botoes_janela_meses("mes_ano_media_tab5", opcoes_mes_ano)
+
     mes_ano_tab5 = st.multiselect(
         "Selecione os Mês/Ano para cálculo da média de faturamento",
-        sorted(df["mes_ano"].dropna().unique()),
+        opcoes_mes_ano,
         key="mes_ano_media_tab5"
     )
 
-    # ==============================
-    # FATURAMENTO ATUAL
-    # ==============================
-
-    df_receita_atual = df_filtrado[
-        df_filtrado["movimento"] == "Receita"
-    ].copy()
-
-    faturamento_atual_group = df_receita_atual.groupby(
-        ['pcontas','filial']
-    )['valor'].sum().reset_index()
-
-    faturamento_atual_group.rename(
-        columns={"valor": "Faturamento_Atual"},
-        inplace=True
-    )
-
     # ==============================
     # BASE PARA MÉDIA
     # ==============================
 
-    df_base_media = df.copy()
-
-    for sel, col in zip(
-        [pcontas_sel, filial_sel],
-        ["pcontas","filial"]
-    ):
-        if sel:
-            df_base_media = df_base_media[df_base_media[col].isin(sel)]
-
-    df_media_receita = df_base_media[
-        df_base_media["movimento"] == "Receita"
-    ].copy()
-
-    if mes_ano_tab5:
-        df_media_receita = df_media_receita[
-            df_media_receita["mes_ano"].isin(mes_ano_tab5)
-        ]
-
-    if not df_media_receita.empty:
-
-        agrupado = df_media_receita.groupby(
-            ['pcontas','filial']
-        )
-
-        df_media = agrupado.agg(
-            Total_Receita=('valor','sum'),
-            Qtd_Meses=('mes_ano','nunique')
-        ).reset_index()
-
-        df_media["Meta_Faturamento"] = (
-            df_media["Total_Receita"] / df_media["Qtd_Meses"]
-        )
-
-        # ==============================
-        # MERGE
-        # ==============================
-
-        df_final = df_media.merge(
-            faturamento_atual_group,
-            on=['pcontas','filial'],
-            how="outer"
-        )
-
-        df_final["Faturamento_Atual"] = df_final["Faturamento_Atual"].fillna(0)
-        df_final["Meta_Faturamento"] = df_final["Meta_Faturamento"].fillna(0)
-        df_final["Faturamento_Atual"] = df_final["Faturamento_Atual"].fillna(0)
-
-        # ==============================
-        # DIFERENÇA
-        # ==============================
-
-        df_final["Diferenca_R$"] = (
-            df_final["Faturamento_Atual"] - df_final["Meta_Faturamento"]
-        )
-
-        # ==============================
-        # VARIAÇÃO %
-        # ==============================
+    df_media = obter_meta(
+        {"pcontas": pcontas_sel, "filial": filial_sel},
+        "Receita",
+        mes_ano_tab5,
+        ['pcontas','filial'],
+        "Total_Receita",
+        "Qtd_Meses",
+        "Meta_Faturamento"
+    )
 
-        df_final["Variação_%"] = df_final.apply(
-            lambda row: (
-                ((row["Faturamento_Atual"] - row["Meta_Faturamento"]) / row["Meta_Faturamento"]) * 100
-                if row["Meta_Faturamento"] != 0 else 0
-            ),
-            axis=1
-        )
+    if not df_media.empty:
 
         # ==============================
-        # ATINGIMENTO DA META
+        # FATURAMENTO ATUAL, MERGE, DIFERENÇA, VARIAÇÃO % E ATINGIMENTO DA META
         # ==============================
 
-        df_final["Atingimento_%"] = df_final.apply(
-            lambda row: (
-                (row["Faturamento_Atual"] / row["Meta_Faturamento"]) * 100
-                if row["Meta_Faturamento"] != 0 else 0
-            ),
-            axis=1
+        df_final = calcular_meta_vs_atual(
+            df_media,
+            [selecao_global, {"movimento": ["Receita"]}],
+            ['pcontas','filial'],
+            "Meta_Faturamento",
+            "Faturamento_Atual",
+            preencher_meta=True,
+            atingimento=True
         )
 
         # ==============================
@@ -1118,39 +1193,16 @@ with tab5:
         # MATRIZ HIERÁRQUICA
         # ==============================
 
-        linhas = []
-
-        for pcontas, df_pc in df_final.groupby("pcontas"):
-
-                meta_pc = df_pc["Meta_Faturamento"].sum()
-                atual_pc = df_pc["Faturamento_Atual"].sum()
-                dif_pc = df_pc["Diferenca_R$"].sum()
-                var_pc = ((atual_pc - meta_pc) / meta_pc * 100) if meta_pc != 0 else 0
-
-                linhas.append({
-                    "Meta_Faturamento": meta_pc,
-                    "Faturamento_Atual": atual_pc,
-                    "Diferenca_R$": dif_pc,
-                    "Variação_%": var_pc,
-                    "path": [pcontas]
-                })
-
-                for filial, df_filial in df_pc.groupby("filial"):
-
-                    meta_filial = df_filial["Meta_Faturamento"].sum()
-                    atual_filial = df_filial["Faturamento_Atual"].sum()
-                    dif_filial = df_filial["Diferenca_R$"].sum()
-                    var_filial = ((atual_filial - meta_filial) / meta_filial * 100) if meta_filial != 0 else 0
-
-                    linhas.append({
-                        "Meta_Faturamento": meta_filial,
-                        "Faturamento_Atual": atual_filial,
-                        "Diferenca_R$": dif_filial,
-                        "Variação_%": var_filial,
-                        "path": [pcontas, filial]
-                    })
-
-        matriz_df = pd.DataFrame(linhas)
+        matriz_df = montar_arvore(
+            df_final,
+            ["pcontas", "filial"],
+            {
+                "Meta_Faturamento": ("soma", "Meta_Faturamento"),
+                "Faturamento_Atual": ("soma", "Faturamento_Atual"),
+                "Diferenca_R$": ("soma", "Diferenca_R$"),
+                "Variação_%": ("variacao_somas", "Faturamento_Atual", "Meta_Faturamento"),
+            }
+        )
 
         # ==============================
         # AGGRID
@@ -1171,40 +1223,32 @@ with tab5:
         }
         """)
 
-        gb = GridOptionsBuilder.from_dataframe(matriz_df)
-
-        gb.configure_column("path", hide=True)
-
-        for col in ["Meta_Faturamento", "Faturamento_Atual", "Diferenca_R$", "Variação_%"]:
-            gb.configure_column(
-                col,
-                type=["numericColumn"],
-                valueFormatter=(
-                    "x.toLocaleString('pt-BR', {style:'currency', currency:'BRL'})"
-                    if col != "Variação_%"
-                    else "x.toFixed(2) + '%'"
-                ),
-                cellStyle=cell_style
-            )
+        def configurar_colunas_faturamento(gb):
 
-        gb.configure_grid_options(
-            treeData=True,
-            animateRows=True,
-            groupDefaultExpanded=0,
-            getDataPath=JsCode("function(data) { return data.path; }")
-        )
+            gb.configure_column("path", hide=True)
 
-        gridOptions = gb.build()
+            for col in ["Meta_Faturamento", "Faturamento_Atual", "Diferenca_R$", "Variação_%"]:
+                gb.configure_column(
+                    col,
+                    type=["numericColumn"],
+                    valueFormatter=(
+                        "x.toLocaleString('pt-BR', {style:'currency', currency:'BRL'})"
+                        if col != "Variação_%"
+                        else "x.toFixed(2) + '%'"
+                    ),
+                    cellStyle=cell_style
+                )
 
-        AgGrid(
-            matriz_df,
-            gridOptions=gridOptions,
-            enable_enterprise_modules=True,
-            fit_columns_on_grid_load=True,
-            theme="streamlit",
-            allow_unsafe_jscode=True,
-            height=650
-        )
+        exibir_arvore_aggrid(matriz_df, "matriz_faturamento", configurar_colunas_faturamento, escopo_rerun="fragment")
 
     else:
         st.warning("Nenhuma receita encontrada para os filtros selecionados.")
+
+
+# ==============================
+# EXECUÇÃO DA ABA ATIVA
+# ==============================
+
+ABAS = dict(zip(NOMES_ABAS, [aba_dashboard, aba_media_despesas, aba_dre, aba_matriz_despesas, aba_meta_faturamento]))
+
+ABAS[aba_ativa]()
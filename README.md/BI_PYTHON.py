@@ -1,23 +1,34 @@
+import os
+import sys
+
 import streamlit as st
 import pandas as pd
-from supabase import create_client
+from supabase import ClientOptions, create_client
 from PIL import Image
 
+# 🔹 Pacote bi/ fica na raiz do repositório, um nível acima deste app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bi.conexao import ConexaoHttp
+from bi.cubo import montar_cubo
+from bi.datasets import CONTAS_MOVIMENTO, criar_cache
+from bi.estilos import estilos_por_sinal
+from bi.filtros import IndiceFiltros, PlanoFiltros
+from bi.formatacao import formatador_reais, formatar_real
+from bi.tratamento import ordem_meses
+
 # ==============================
 # FUNÇÕES
 # ==============================
 
-def formatar_real(valor):
-    if pd.isna(valor):
-        return ""
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+# 🔹 Mesma regra do antigo colorir_valor: verde se positivo, vermelho se negativo
+COR_POR_SINAL = {
+    "positivo": "color: green; font-weight: bold",
+    "negativo": "color: red; font-weight: bold",
+}
 
-def colorir_valor(val):
-    if val > 0:
-        return "color: green; font-weight: bold"
-    elif val < 0:
-        return "color: red; font-weight: bold"
-    return ""
+def colorir_valor(df, colunas):
+    return estilos_por_sinal(df, {col: COR_POR_SINAL for col in colunas})
 
 # ==============================
 # CONFIGURAÇÃO
@@ -25,7 +36,25 @@ def colorir_valor(val):
 
 url = "https://sbpgrmsxdmunnzsckqrh.supabase.co"
 key = "sb_publishable_TmQzWQo_ceBPYD91ME9Sjw_azJWpNkR"
-supabase = create_client(url, key)
+
+
+# 🔹 Mesmo cliente HTTP compartilhado do app principal (pool keep-alive, HTTP/2, retentativas)
+@st.cache_resource
+def obter_supabase():
+    conexao_http = ConexaoHttp()
+    return create_client(url, key, options=ClientOptions(httpx_client=conexao_http.cliente))
+
+
+supabase = obter_supabase()
+
+# 🔹 Mesma definição declarativa, carga em cache e snapshot local do app principal
+DATASET = CONTAS_MOVIMENTO
+TTL_CACHE_SEGUNDOS = 600
+TAMANHO_PAGINA = 1000
+MAX_WORKERS_CARGA = 8
+RECONCILIAR_A_CADA_SEGUNDOS = 6 * 60 * 60
+PASTA_SNAPSHOTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "snapshots")
+MODO_OFFLINE = os.environ.get("BI_OFFLINE") == "1"
 
 st.set_page_config(layout="wide")
 
@@ -57,49 +86,51 @@ st.title("📊 Dashboard Financeiro - CBR")
 # BUSCAR DADOS
 # ==============================
 
-response = supabase.table("vw_contas_movimento").select("*").execute()
-data = response.data
-df = pd.DataFrame(data)
-
-# 🔹 Renomear fornecedor para filial
-if "fornecedor" in df.columns:
-    df = df.rename(columns={"fornecedor": "filial"})
+@st.cache_resource
+def obter_cache_movimento():
+    return criar_cache(
+        supabase,
+        DATASET,
+        PASTA_SNAPSHOTS,
+        ttl=TTL_CACHE_SEGUNDOS,
+        tamanho_pagina=TAMANHO_PAGINA,
+        max_workers=MAX_WORKERS_CARGA,
+        reconciliar_a_cada=RECONCILIAR_A_CADA_SEGUNDOS,
+        offline=MODO_OFFLINE
+    )
+
+
+# 🔹 Renomeio fornecedor → filial, nulos, datas, valores, ano/mês e mes_ano vêm da definição
+snapshot, estado_cache = obter_cache_movimento().obter()
+df = snapshot.df
+
+if df.empty:
+    st.warning("Nenhum dado encontrado.")
+    st.stop()
 
 # ==============================
-# TRATAR VALORES NULOS
+# CUBO E ÍNDICE DE FILTROS
 # ==============================
 
-df["grupo"] = df["grupo"].fillna("Não informado")
-df["filial"] = df["filial"].fillna("Não informado")
-df["pcontas"] = df["pcontas"].fillna("Não informado")
-df["tipo_conta"] = df["tipo_conta"].fillna("Não informado")
-
-df['dt_lancamento'] = pd.to_datetime(df['dt_lancamento'], errors='coerce')
-df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
-df = df.dropna(subset=['dt_lancamento', 'valor'])
-df['movimento'] = df['movimento'].str.strip().str.capitalize()
-
-# 🔹 Criar colunas de Ano e Mês
-meses = {
-    1: "Janeiro", 2: "Fevereiro", 3: "Março",
-    4: "Abril", 5: "Maio", 6: "Junho",
-    7: "Julho", 8: "Agosto", 9: "Setembro",
-    10: "Outubro", 11: "Novembro", 12: "Dezembro"
-}
+@st.cache_resource(max_entries=2)
+def obter_cubo(versao, _df):
+    return montar_cubo(_df, DATASET.dimensoes_cubo)
 
-df['ano'] = df['dt_lancamento'].dt.year
-df['mes'] = df['dt_lancamento'].dt.month
-df['nome_mes'] = df['mes'].map(meses)
 
-if not data:
-    st.warning("Nenhum dado encontrado.")
-    st.stop()
+@st.cache_resource(max_entries=2)
+def obter_indice_filtros(versao, _cubo):
+    return IndiceFiltros(_cubo, DATASET.dimensoes_filtro)
+
+
+cubo = obter_cubo(estado_cache.versao, df)
+indice = obter_indice_filtros(estado_cache.versao, cubo)
+plano_filtros = PlanoFiltros(indice, cubo)
 
 # ==============================
 # CARDS DE TOTAL GERAL (RESTAURADOS)
 # ==============================
 
-totais = df.groupby('movimento')['valor'].sum()
+totais = cubo.groupby('movimento', observed=True)['valor'].sum()
 receita_total = totais.get('Receita', 0)
 despesa_total = totais.get('Despesa', 0)
 resultado_total = receita_total + despesa_total
@@ -136,9 +167,8 @@ col3.markdown(f"""
 # AGRUPAMENTO MÊS/ANO
 # ==============================
 
-df['mes_ano'] = df['dt_lancamento'].dt.to_period('M').astype(str)
 grouped_mensal = (
-    df.groupby(['mes_ano', 'movimento'])['valor']
+    cubo.groupby(['mes_ano', 'movimento'], observed=True)['valor']
     .sum()
     .unstack(fill_value=0)
     .sort_index()
@@ -150,7 +180,11 @@ if 'Despesa' not in grouped_mensal.columns:
 grouped_mensal['Resultado'] = grouped_mensal['Receita'] + grouped_mensal['Despesa']
 
 st.subheader("📅 Valores por Mês/Ano")
-styled = grouped_mensal.style.format(formatar_real).applymap(colorir_valor)
+styled = (
+    grouped_mensal.style
+    .format(formatador_reais(*(grouped_mensal[col] for col in grouped_mensal.columns)))
+    .apply(colorir_valor, axis=None, colunas=grouped_mensal.columns)
+)
 st.dataframe(styled, use_container_width=True)
 
 # ==============================
@@ -159,16 +193,15 @@ st.dataframe(styled, use_container_width=True)
 
 st.subheader("📋 Detalhamento das Movimentações")
 col_data1, col_data2 = st.columns(2)
-ano_sel = col_data1.multiselect("Ano", options=sorted(df["ano"].dropna().unique()), key="ano")
-ordem_meses = ["Janeiro","Fevereiro","Março","Abril","Maio","Junho","Julho","Agosto","Setembro","Outubro","Novembro","Dezembro"]
-mes_sel = col_data2.multiselect("Mês", options=sorted(df["nome_mes"].dropna().unique(), key=lambda x: ordem_meses.index(x)), key="mes")
+ano_sel = col_data1.multiselect("Ano", options=indice.opcoes("ano"), key="ano")
+mes_sel = col_data2.multiselect("Mês", options=indice.opcoes("nome_mes"), key="mes")
 
 col_f1, col_f2, col_f3, col_f4, col_f5 = st.columns(5)
-grupo_sel = col_f1.multiselect("Grupo", options=sorted(df["grupo"].dropna().unique()), key="grupo")
-filial_sel = col_f2.multiselect("Filial", options=sorted(df["filial"].dropna().unique()), key="filial")
-movimento_sel = col_f3.multiselect("Movimento", options=sorted(df["movimento"].dropna().unique()), key="movimento")
-tipo_conta_sel = col_f4.multiselect("Tipo Conta", options=sorted(df["tipo_conta"].dropna().unique()), key="tipo_conta")
-pcontas_sel = col_f5.multiselect("PContas", options=sorted(df["pcontas"].dropna().unique()), key="pcontas")
+grupo_sel = col_f1.multiselect("Grupo", options=indice.opcoes("grupo"), key="grupo")
+filial_sel = col_f2.multiselect("Filial", options=indice.opcoes("filial"), key="filial")
+movimento_sel = col_f3.multiselect("Movimento", options=indice.opcoes("movimento"), key="movimento")
+tipo_conta_sel = col_f4.multiselect("Tipo Conta", options=indice.opcoes("tipo_conta"), key="tipo_conta")
+pcontas_sel = col_f5.multiselect("PContas", options=indice.opcoes("pcontas"), key="pcontas")
 
 # Botão Limpar Filtros
 def limpar_filtros():
@@ -185,28 +218,23 @@ st.button("🔄 Limpar filtros", on_click=limpar_filtros)
 # APLICAR FILTROS
 # ==============================
 
-df_filtrado = df.copy()
-if ano_sel:
-    df_filtrado = df_filtrado[df_filtrado["ano"].isin(ano_sel)]
-if mes_sel:
-    df_filtrado = df_filtrado[df_filtrado["nome_mes"].isin(mes_sel)]
-if grupo_sel:
-    df_filtrado = df_filtrado[df_filtrado["grupo"].isin(grupo_sel)]
-if filial_sel:
-    df_filtrado = df_filtrado[df_filtrado["filial"].isin(filial_sel)]
-if movimento_sel:
-    df_filtrado = df_filtrado[df_filtrado["movimento"].isin(movimento_sel)]
-if tipo_conta_sel:
-    df_filtrado = df_filtrado[df_filtrado["tipo_conta"].isin(tipo_conta_sel)]
-if pcontas_sel:
-    df_filtrado = df_filtrado[df_filtrado["pcontas"].isin(pcontas_sel)]
+df_filtrado = plano_filtros.frame({
+    "ano": ano_sel,
+    "nome_mes": mes_sel,
+    "grupo": grupo_sel,
+    "filial": filial_sel,
+    "movimento": movimento_sel,
+    "tipo_conta": tipo_conta_sel,
+    "pcontas": pcontas_sel,
+})
 
 # ==============================
 # TOTAL DINÂMICO (FILTRADO)
 # ==============================
 
-receita_filtrada = df_filtrado.loc[df_filtrado["movimento"]=="Receita","valor"].sum()
-despesa_filtrada = df_filtrado.loc[df_filtrado["movimento"]=="Despesa","valor"].sum()
+totais_filtrados = df_filtrado.groupby('movimento', observed=True)['valor'].sum()
+receita_filtrada = totais_filtrados.get('Receita', 0)
+despesa_filtrada = totais_filtrados.get('Despesa', 0)
 resultado_filtrado = receita_filtrada + despesa_filtrada
 
 col_t1, col_t2, col_t3 = st.columns(3)
@@ -225,13 +253,17 @@ col_t3.markdown(f"""<div style="background:white;padding:15px;border-radius:10px
 # TABELA DETALHADA DE MOVIMENTAÇÕES
 # ==============================
 
-df_detalhe = df_filtrado.groupby(['grupo','filial','ano','nome_mes','tipo_conta','pcontas','movimento'], dropna=False)['valor'].sum().unstack(fill_value=0).reset_index()
+df_detalhe = df_filtrado.groupby(['grupo','filial','ano','nome_mes','tipo_conta','pcontas','movimento'], dropna=False, observed=True)['valor'].sum().unstack(fill_value=0).reset_index()
 if "Receita" not in df_detalhe.columns:
     df_detalhe["Receita"] = 0
 if "Despesa" not in df_detalhe.columns:
     df_detalhe["Despesa"] = 0
 
-styled_detalhe = df_detalhe.style.format({"Receita":formatar_real,"Despesa":formatar_real}).applymap(colorir_valor, subset=["Receita","Despesa"])
+styled_detalhe = (
+    df_detalhe.style
+    .format(formatador_reais(df_detalhe["Receita"], df_detalhe["Despesa"]), subset=["Receita","Despesa"])
+    .apply(colorir_valor, axis=None, colunas=["Receita","Despesa"])
+)
 st.subheader("📂 Visão Detalhada por Grupo, Filial, Ano, Mês, Tipo Conta e PContas")
 st.dataframe(styled_detalhe,use_container_width=True)
 
@@ -239,15 +271,10 @@ st.dataframe(styled_detalhe,use_container_width=True)
 # TABELA HIERÁRQUICA DE DESPESAS (FILTRADA POR ANO, GRUPO, FILIAL E PCONTAS, NÃO MÊS)
 # ==============================
 
-df_despesas = df[df["movimento"]=="Despesa"].copy()
-if ano_sel:
-    df_despesas = df_despesas[df_despesas["ano"].isin(ano_sel)]
-if grupo_sel:
-    df_despesas = df_despesas[df_despesas["grupo"].isin(grupo_sel)]
-if filial_sel:
-    df_despesas = df_despesas[df_despesas["filial"].isin(filial_sel)]
-if pcontas_sel:
-    df_despesas = df_despesas[df_despesas["pcontas"].isin(pcontas_sel)]
+df_despesas = plano_filtros.frame(
+    {"ano": ano_sel, "grupo": grupo_sel, "filial": filial_sel, "pcontas": pcontas_sel},
+    {"movimento": ["Despesa"]}
+)
 
 df_despesas_pivot = pd.pivot_table(
     df_despesas,
@@ -255,13 +282,20 @@ df_despesas_pivot = pd.pivot_table(
     columns='nome_mes',
     values='valor',
     aggfunc='sum',
-    fill_value=0
+    fill_value=0,
+    observed=True
 )
 
 # Ordenar colunas existentes
 meses_existentes = [m for m in ordem_meses if m in df_despesas_pivot.columns]
-df_despesas_pivot = df_despesas_pivot[meses_existentes].reset_index()
-
-styled_despesas = df_despesas_pivot.style.format({mes:formatar_real for mes in meses_existentes}).applymap(colorir_valor, subset=meses_existentes)
+df_despesas_pivot = df_despesas_pivot[meses_existentes]
+df_despesas_pivot.columns = pd.Index(meses_existentes, name="nome_mes")
+df_despesas_pivot = df_despesas_pivot.reset_index()
+
+styled_despesas = (
+    df_despesas_pivot.style
+    .format(formatador_reais(*(df_despesas_pivot[mes] for mes in meses_existentes)), subset=meses_existentes)
+    .apply(colorir_valor, axis=None, colunas=meses_existentes)
+)
 st.subheader("📂 Despesas Mês a Mês por Grupo, Filial, Tipo Conta e PContas (Filtro por Ano, Grupo, Filial e PContas)")
-st.dataframe(styled_despesas,use_container_width=True)
\ No newline at end of file
+st.dataframe(styled_despesas,use_container_width=True)
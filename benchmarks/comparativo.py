@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# 🔹 Pacote bi/ fica na raiz do repositório, um nível acima deste script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bi.comparativo import comparar_meta_atual
+
+
+# ==============================
+# BENCHMARK: META x ATUAL (APPLY POR LINHA x VETORIZADO)
+# ==============================
+# Uso: python benchmarks/comparativo.py [linhas] [repeticoes]
+
+def montar_merge(linhas, semente=42):
+    rng = np.random.default_rng(semente)
+
+    meta = rng.normal(-5000, 3000, linhas).round(2)
+    meta[rng.random(linhas) < 0.05] = 0.0
+    meta[rng.random(linhas) < 0.05] = np.nan
+
+    return pd.DataFrame({
+        "razao": rng.integers(0, 500, linhas).astype(str),
+        "Meta_Faturamento": meta,
+        "Faturamento_Atual": rng.normal(-5000, 3000, linhas).round(2),
+    })
+
+
+def linha_a_linha(df):
+    # 🔹 Cálculo anterior das abas 2, 4 e 5 (df.apply com axis=1)
+    df = df.copy()
+    df["Diferenca_R$"] = df["Faturamento_Atual"] - df["Meta_Faturamento"]
+    df["Variação_%"] = df.apply(
+        lambda row: (
+            ((row["Faturamento_Atual"] - row["Meta_Faturamento"]) / row["Meta_Faturamento"]) * 100
+            if row["Meta_Faturamento"] != 0 else 0
+        ),
+        axis=1
+    )
+    df["Atingimento_%"] = df.apply(
+        lambda row: (
+            (row["Faturamento_Atual"] / row["Meta_Faturamento"]) * 100
+            if row["Meta_Faturamento"] != 0 else 0
+        ),
+        axis=1
+    )
+    return df
+
+
+def vetorizado(df):
+    return comparar_meta_atual(df, "Meta_Faturamento", "Faturamento_Atual", atingimento=True)
+
+
+def medir(funcao, df, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao(df)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor, resultado
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    df = montar_merge(linhas)
+
+    tempo_apply, esperado = medir(linha_a_linha, df, repeticoes)
+    tempo_vetor, obtido = medir(vetorizado, df, repeticoes)
+
+    pd.testing.assert_frame_equal(obtido, esperado, check_exact=True)
+
+    print(f"{linhas} linhas, melhor de {repeticoes}")
+    print(f"apply por linha: {tempo_apply * 1000:10.1f} ms")
+    print(f"vetorizado:      {tempo_vetor * 1000:10.1f} ms")
+    print(f"ganho:           {tempo_apply / tempo_vetor:10.0f}x (resultado idêntico)")
+
+
+if __name__ == "__main__":
+    main()
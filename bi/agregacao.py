@@ -0,0 +1,65 @@
+import sqlite3
+import time
+
+import pandas as pd
+
+from bi.sincronizacao import SnapshotDados
+
+
+# ==============================
+# AGREGAÇÃO NO SERVIDOR (PUSH-DOWN VIA RPC)
+# ==============================
+
+# 🔹 Mesmas medidas do montar_cubo: soma, nº de lançamentos e menor chave (ordem original)
+MEDIDAS_AGREGADAS = ["valor", "linhas", "primeira_linha"]
+
+
+def sql_agregacao(relacao, dimensoes, chave="id", medida="valor"):
+    colunas = ", ".join(f'"{col}"' for col in dimensoes)
+
+    return (
+        f'SELECT {colunas}, SUM("{medida}") AS "{medida}", COUNT(*) AS linhas, '
+        f'MIN("{chave}") AS primeira_linha '
+        f'FROM "{relacao}" GROUP BY {colunas} ORDER BY primeira_linha'
+    )
+
+
+class AgregadorRPC:
+
+    def __init__(self, cliente, funcao):
+        self.cliente = cliente
+        self.funcao = funcao
+
+    def agregar(self, dimensoes):
+        # 🔹 Função Postgres (sql/bi_agregar_contas.sql) devolve um único jsonb com os grupos:
+        # sem paginação e sem o limite de linhas do PostgREST
+        resposta = self.cliente.rpc(self.funcao, {"p_dimensoes": list(dimensoes)}).execute()
+        return pd.DataFrame(resposta.data or [], columns=list(dimensoes) + MEDIDAS_AGREGADAS)
+
+
+class AgregadorSQLite:
+
+    # 🔹 Substituto local do Postgres (desenvolvimento/paridade): mesma consulta de agregação
+    # sobre as linhas já tratadas, num banco em memória
+    def __init__(self, df, colunas, relacao="lancamentos"):
+        self.relacao = relacao
+        self.conexao = sqlite3.connect(":memory:", check_same_thread=False)
+        df[colunas].astype(object).to_sql(relacao, self.conexao, index=False)
+
+    def agregar(self, dimensoes):
+        return pd.read_sql_query(sql_agregacao(self.relacao, dimensoes), self.conexao)
+
+
+def carregar_agregado(agregador, dimensoes, tipar):
+    t0 = time.perf_counter()
+    df = agregador.agregar(dimensoes)
+    segundos = time.perf_counter() - t0
+
+    tempos = pd.DataFrame([{"pagina": 0, "inicio": 0, "linhas": len(df), "segundos": segundos}])
+
+    return SnapshotDados(
+        tipar(df),
+        tempos,
+        modo="agregada",
+        linhas_recebidas=len(df)
+    )
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# ÁRVORE HIERÁRQUICA PARA O AGGRID (treeData)
+# ==============================
+#
+# agregacoes: {coluna_saida: especificação}
+#   ("soma", col)                      soma da coluna
+#   ("soma_se", col, col_cond, valor)  soma só das linhas com col_cond == valor
+#   ("media", col)                     média da coluna
+#   ("razao_somas", num, den)          soma(num) / soma(den) * 100 (den zero = 0)
+#   ("variacao_somas", atual, meta)    (soma(atual) - soma(meta)) / soma(meta) * 100
+#   ("primeiro", col)                  primeiro valor do grupo
+#   ("fixo", valor)                    valor constante
+#
+# agregacoes_por_nivel: {profundidade (0 = raiz): {coluna_saida: especificação}}
+#   substitui as especificações só naquele nível
+
+def _agregar_nivel(df, chaves, agregacoes):
+    grupos = df.groupby(chaves, observed=True, sort=True)
+
+    somas = set()
+    for spec in agregacoes.values():
+        if spec[0] == "soma":
+            somas.add(spec[1])
+        elif spec[0] in ("razao_somas", "variacao_somas"):
+            somas.update(spec[1:3])
+
+    condicionais = {}
+    for saida, spec in agregacoes.items():
+        if spec[0] == "soma_se":
+            _, col, col_cond, valor = spec
+            condicionais[saida] = df[col].where(df[col_cond] == valor, 0)
+
+    tabela_somas = grupos[sorted(somas)].sum() if somas else None
+    nivel = grupos.size().to_frame("_n")
+
+    if condicionais:
+        extras = pd.DataFrame(condicionais, index=df.index)
+        tabela_cond = extras.groupby([df[c] for c in chaves], observed=True, sort=True).sum()
+    else:
+        tabela_cond = None
+
+    for saida, spec in agregacoes.items():
+        tipo = spec[0]
+
+        if tipo == "soma":
+            nivel[saida] = tabela_somas[spec[1]]
+        elif tipo == "soma_se":
+            nivel[saida] = tabela_cond[saida]
+        elif tipo == "media":
+            nivel[saida] = grupos[spec[1]].mean()
+        elif tipo == "primeiro":
+            nivel[saida] = grupos[spec[1]].first()
+        elif tipo == "fixo":
+            nivel[saida] = spec[1]
+        elif tipo in ("razao_somas", "variacao_somas"):
+            num = tabela_somas[spec[1]].to_numpy(dtype="float64")
+            den = tabela_somas[spec[2]].to_numpy(dtype="float64")
+            if tipo == "variacao_somas":
+                num = num - den
+            with np.errstate(divide="ignore", invalid="ignore"):
+                nivel[saida] = np.where(den != 0, num / den * 100, 0.0)
+        else:
+            raise ValueError(f"Agregação desconhecida: {tipo}")
+
+    return nivel.drop(columns="_n").reset_index()
+
+
+def _codigos_ordem(serie_base, valores):
+    # 🔹 Mesma ordem do groupby: categorias do categórico ou valores ordenados
+    if isinstance(serie_base.dtype, pd.CategoricalDtype):
+        categorias = serie_base.cat.categories
+    else:
+        categorias = pd.Index(serie_base.dropna().unique()).sort_values()
+    return pd.Categorical(valores, categories=categorias).codes
+
+
+def montar_arvore(df, niveis, agregacoes, agregacoes_por_nivel=None):
+    agregacoes_por_nivel = agregacoes_por_nivel or {}
+    partes = []
+
+    for profundidade in range(len(niveis)):
+        chaves = niveis[:profundidade + 1]
+        specs = {**agregacoes, **agregacoes_por_nivel.get(profundidade, {})}
+        nivel = _agregar_nivel(df, chaves, specs)
+
+        nivel["path"] = [list(chave) for chave in zip(*(nivel[c] for c in chaves))]
+
+        # 🔹 Chave de ordenação: pai (-1 nos níveis abaixo) vem antes dos filhos
+        ordem = [f"_ordem_{i}" for i in range(len(niveis))]
+        for i, col in enumerate(niveis):
+            nivel[ordem[i]] = _codigos_ordem(df[col], nivel[col]) if col in chaves else -1
+
+        partes.append(nivel[list(agregacoes) + ["path"] + ordem])
+
+    arvore = pd.concat(partes, ignore_index=True)
+    arvore = arvore.sort_values(ordem, kind="stable", ignore_index=True)
+
+    return arvore.drop(columns=ordem)
+
+
+# ==============================
+# ÁRVORE SOB DEMANDA (SÓ OS NÓS ABERTOS VÃO PARA O NAVEGADOR)
+# ==============================
+
+class ArvoreSobDemanda:
+
+    def __init__(self, arvore):
+        self.arvore = arvore
+        self._caminhos = [tuple(p) for p in arvore["path"]]
+
+        # 🔹 Filhos indexados pelo caminho do pai (raiz = tupla vazia)
+        self._filhos = {}
+        for i, caminho in enumerate(self._caminhos):
+            self._filhos.setdefault(caminho[:-1], []).append(i)
+
+    def tem_filhos(self, caminho):
+        return tuple(caminho) in self._filhos
+
+    def filhos(self, caminho):
+        return self.arvore.iloc[self._filhos.get(tuple(caminho), [])]
+
+    def visiveis(self, expandidos):
+        indices = []
+        pendentes = [()]
+
+        while pendentes:
+            pai = pendentes.pop()
+            for i in self._filhos.get(pai, []):
+                indices.append(i)
+                caminho = self._caminhos[i]
+                if caminho in expandidos and caminho in self._filhos:
+                    pendentes.append(caminho)
+
+        indices.sort()
+        linhas = self.arvore.iloc[indices].reset_index(drop=True)
+
+        marcador = []
+        for i in indices:
+            caminho = self._caminhos[i]
+            if caminho not in self._filhos:
+                marcador.append("")
+            else:
+                marcador.append("➖" if caminho in expandidos else "➕")
+        linhas.insert(0, "Abrir", marcador)
+
+        return linhas
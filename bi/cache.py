@@ -0,0 +1,182 @@
+import threading
+import time
+
+
+# ==============================
+# CACHE DO DATASET (COMPARTILHADO ENTRE SESSÕES)
+# ==============================
+
+class EstadoCache:
+
+    def __init__(self, status, carregado_em, versao, acertos, falhas, erro=None, erro_snapshot=None):
+        self.status = status
+        self.carregado_em = carregado_em
+        self.versao = versao
+        self.acertos = acertos
+        self.falhas = falhas
+        self.erro = erro
+        self.erro_snapshot = erro_snapshot
+
+    @property
+    def idade(self):
+        if self.carregado_em is None:
+            return 0.0
+        return time.time() - self.carregado_em
+
+
+class CacheDataset:
+
+    def __init__(self, carregar, ttl=600, atualizar=None, reconciliar_a_cada=None,
+                 abrir_local=None, salvar_local=None, offline=False):
+        self._carregar = carregar
+        self._atualizar = atualizar
+        self._abrir_local = abrir_local
+        self._salvar_local = salvar_local
+        self.ttl = ttl
+        self.reconciliar_a_cada = reconciliar_a_cada
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._dados = None
+        self._carregado_em = None
+        self._reconciliado_em = None
+        self._verificando = False
+        # 🔹 "Atualizar" pedido durante a verificação em segundo plano: aplicado quando ela termina
+        self._invalidacao_pendente = None
+        self.erro = None
+        self.erro_snapshot = None
+        self.versao = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def _expirado(self):
+        if self.offline and self._dados is not None:
+            return False
+        return (
+            self._carregado_em is None
+            or (self.ttl is not None and time.time() - self._carregado_em > self.ttl)
+        )
+
+    def _reconciliacao_pendente(self):
+        return (
+            self._dados is None
+            or self._atualizar is None
+            or (
+                self.reconciliar_a_cada is not None
+                and time.time() - self._reconciliado_em > self.reconciliar_a_cada
+            )
+        )
+
+    def _estado(self, status):
+        return EstadoCache(
+            status, self._carregado_em, self.versao, self.acertos, self.falhas, self.erro,
+            self.erro_snapshot
+        )
+
+    def _salvar(self, dados):
+        if self._salvar_local is None:
+            return
+        # 🔹 Falha ao gravar o arquivo local é problema de disco, não da origem: erro separado
+        try:
+            self._salvar_local(dados)
+            self.erro_snapshot = None
+        except Exception as erro:
+            self.erro_snapshot = erro
+
+    def _abrir_snapshot_local(self):
+        # 🔹 Partida a frio: usa o arquivo local e confere com a origem em segundo plano
+        local = self._abrir_local() if self._abrir_local is not None else None
+
+        if local is None:
+            if self.offline:
+                raise RuntimeError("Modo offline sem snapshot local disponível.")
+            return False
+
+        self._dados = local
+        self._carregado_em = time.time()
+        self._reconciliado_em = time.time()
+        self.versao += 1
+        self.falhas += 1
+
+        if not self.offline:
+            self._verificando = True
+            threading.Thread(target=self._verificar_origem, daemon=True).start()
+
+        return True
+
+    def _verificar_origem(self):
+        try:
+            with self._lock:
+                base = self._dados
+
+            novo = self._atualizar(base) if self._atualizar else self._carregar()
+
+            with self._lock:
+                # 🔹 Só troca se ninguém recarregou enquanto a verificação rodava
+                if self._dados is base:
+                    if novo is not base:
+                        self._dados = novo
+                        self.versao += 1
+                    self._carregado_em = time.time()
+                    self.erro = None
+
+            if novo is not base:
+                self._salvar(novo)
+        except Exception as erro:
+            self.erro = erro
+        finally:
+            self._verificando = False
+
+    def _aplicar_invalidacao(self, completo):
+        self._carregado_em = None
+        if completo:
+            self._dados = None
+
+    def obter(self):
+        salvar = None
+
+        # 🔹 Lock único: sessões simultâneas esperam uma só carga em vez de repetir a busca
+        with self._lock:
+            if self._invalidacao_pendente is not None and not self._verificando:
+                self._aplicar_invalidacao(self._invalidacao_pendente)
+                self._invalidacao_pendente = None
+
+            if self._dados is None and self._abrir_snapshot_local():
+                status = "snapshot"
+            elif self._expirado() and not self._verificando:
+                anterior = self._dados
+
+                if self._reconciliacao_pendente():
+                    self._dados = self._carregar()
+                    self._reconciliado_em = time.time()
+                    status = "miss"
+                else:
+                    self._dados = self._atualizar(self._dados)
+                    status = "delta"
+
+                self._carregado_em = time.time()
+                self.falhas += 1
+                self.erro = None
+
+                # 🔹 Delta vazio devolve o mesmo objeto: a versão (e o que depende dela) é mantida
+                if self._dados is not anterior:
+                    self.versao += 1
+                    salvar = self._dados
+            else:
+                self.acertos += 1
+                status = "hit"
+
+            dados, estado = self._dados, self._estado(status)
+
+        if salvar is not None:
+            self._salvar(salvar)
+
+        return dados, estado
+
+    def invalidar(self, completo=False):
+        with self._lock:
+            # 🔹 Verificação em andamento: mantém dados e horário (quem lê continua com o snapshot)
+            # e deixa a recarga para o primeiro obter() depois que ela terminar
+            if self._verificando:
+                self._invalidacao_pendente = bool(self._invalidacao_pendente) or completo
+                return
+            self._aplicar_invalidacao(completo)
@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+
+# ==============================
+# CARGA PAGINADA (SUPABASE / POSTGREST)
+# ==============================
+
+def buscar_pagina(cliente, view, inicio, tamanho, coluna_ordem=None, contar=False, desde=None):
+    # 🔹 Retentativa fica só no transporte (bi/conexao): com a do postgrest-py por cima,
+    # um 503 persistente virava 4 x 4 = 16 pedidos por página
+    consulta = cliente.table(view).select("*", count="exact" if contar else None).retry(False)
+
+    # 🔹 desde = (coluna, valor): só linhas alteradas depois da marca informada
+    if desde:
+        consulta = consulta.gt(desde[0], desde[1])
+
+    # 🔹 Ordem estável: sem ela o Postgres pode repetir/pular linhas entre páginas
+    if coluna_ordem:
+        consulta = consulta.order(coluna_ordem)
+
+    t0 = time.perf_counter()
+    resposta = consulta.range(inicio, inicio + tamanho - 1).execute()
+    segundos = time.perf_counter() - t0
+
+    return resposta, segundos
+
+
+def juntar_registros(paginas):
+    return pd.DataFrame([linha for pagina in paginas for linha in pagina])
+
+
+def buscar_paginado(cliente, view, coluna_ordem="id", tamanho_pagina=1000, max_workers=8, desde=None,
+                    fonte=None):
+    tempos = []
+
+    # 🔹 fonte: outra forma de buscar/juntar as páginas (ex.: CSV → Arrow, bi/carga_csv.py);
+    # sem ela, JSON do cliente supabase (uma lista de dicts por página)
+    buscar = fonte.buscar_pagina if fonte is not None else partial(buscar_pagina, cliente)
+    juntar = fonte.juntar if fonte is not None else juntar_registros
+
+    # 🔹 Primeira página já traz o total de linhas da view
+    primeira, segundos = buscar(
+        view, 0, tamanho_pagina, coluna_ordem, contar=True, desde=desde
+    )
+    dados = primeira.data or []
+    total = primeira.count if primeira.count is not None else len(dados)
+    tempos.append({"pagina": 0, "inicio": 0, "linhas": len(dados), "segundos": segundos})
+
+    # 🔹 Se o PostgREST limitou a página (max-rows), usa o limite real do servidor
+    if 0 < len(dados) < tamanho_pagina and len(dados) < total:
+        tamanho_pagina = len(dados)
+
+    inicios = list(range(len(dados), total, tamanho_pagina))
+    paginas = [dados]
+
+    if inicios:
+        def _buscar(inicio):
+            resposta, seg = buscar(
+                view, inicio, tamanho_pagina, coluna_ordem, desde=desde
+            )
+            return resposta.data or [], seg
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(inicios)))) as executor:
+            resultados = list(executor.map(_buscar, inicios))
+
+        for n, (inicio, (linhas, seg)) in enumerate(zip(inicios, resultados), start=1):
+            paginas.append(linhas)
+            tempos.append({"pagina": n, "inicio": inicio, "linhas": len(linhas), "segundos": seg})
+
+    return juntar(paginas), pd.DataFrame(tempos)
@@ -0,0 +1,212 @@
+import csv
+import io
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+
+# ==============================
+# CARGA EM CSV → ARROW (SEM UM DICT POR LINHA)
+# ==============================
+
+# 🔹 Mesma regra do pd.to_numeric(errors="coerce"): texto que não é número vira nulo
+PADRAO_NUMERO = r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$"
+
+# 🔹 Data/timestamp ISO-8601 como o Postgres escreve no CSV: só data, hora com ou sem fração
+# (a precisão varia de linha para linha) e fuso opcional ("+00", "+00:00", "Z"); o resto vira nulo
+PADRAO_ISO8601 = r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?)?(Z|[+-]\d{2}(:?\d{2})?)?$"
+# 🔹 Fuso só conta depois da hora: o "-05" final de "2024-01-05" é o dia, não um fuso
+PADRAO_FUSO = r"\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}(:?\d{2})?)$"
+
+BLOCO_CSV = 1 << 20
+
+
+class _FluxoResposta(io.RawIOBase):
+
+    # 🔹 Arquivo somente-leitura sobre os pedaços da resposta HTTP: o leitor CSV
+    # consome o corpo à medida que chega, sem juntar tudo num único bytes
+    def __init__(self, pedacos, inicio=b""):
+        self._pedacos = pedacos
+        self._resto = inicio
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        while not self._resto:
+            self._resto = next(self._pedacos, None)
+            if self._resto is None:
+                self._resto = b""
+                return 0
+
+        n = min(len(destino), len(self._resto))
+        destino[:n] = self._resto[:n]
+        self._resto = self._resto[n:]
+        return n
+
+
+def _ler_cabecalho(pedacos):
+    lido = b""
+    for pedaco in pedacos:
+        lido += pedaco
+        if b"\n" in lido:
+            break
+
+    linha = lido.split(b"\n", 1)[0].decode("utf-8-sig").rstrip("\r")
+    nomes = next(csv.reader([linha]), []) if linha else []
+    return nomes, lido
+
+
+def _numero(coluna):
+    valido = pc.match_substring_regex(coluna, PADRAO_NUMERO)
+    return pc.cast(pc.utf8_trim_whitespace(pc.if_else(valido, coluna, None)), pa.float64())
+
+
+def _converter_datas(texto, tipo):
+    try:
+        return pc.cast(texto, tipo)
+    except pa.ArrowInvalid:
+        # 🔹 Formato certo mas data impossível (ex.: 2024-02-30): só os textos distintos
+        # do bloco são convertidos um a um, e o que falhar vira nulo
+        distintos = pc.unique(texto).drop_null()
+        convertidos = []
+        for valor in distintos.to_pylist():
+            try:
+                convertidos.append(pc.cast(pa.scalar(valor), tipo))
+            except pa.ArrowInvalid:
+                convertidos.append(pa.scalar(None, tipo))
+        return pc.take(pa.array(convertidos, tipo), pc.index_in(texto, distintos))
+
+
+def _data(coluna):
+    # 🔹 Mesma regra do pd.to_datetime(format="ISO8601", errors="coerce", utc=True) da carga JSON:
+    # timestamps com fuso saem em UTC (datetime64[us, UTC]), sem fuso saem ingênuos
+    texto = pc.utf8_trim_whitespace(coluna)
+    texto = pc.if_else(pc.match_substring_regex(texto, PADRAO_ISO8601), texto, None)
+    if texto.null_count == len(texto):
+        # 🔹 Bloco sem nenhuma data válida: tipo nulo, promovido ao tipo dos outros blocos
+        return pa.nulls(len(texto))
+
+    com_fuso = pc.match_substring_regex(texto, PADRAO_FUSO)
+    if pc.any(com_fuso).as_py():
+        # 🔹 Coluna timestamptz: valor sem fuso é lido como UTC, como no pandas
+        tipo = pa.timestamp("us", tz="UTC")
+        ingenuas = _converter_datas(pc.if_else(com_fuso, None, texto), pa.timestamp("us"))
+        return pc.if_else(com_fuso, _converter_datas(pc.if_else(com_fuso, texto, None), tipo), ingenuas.cast(tipo))
+
+    return _converter_datas(texto, pa.timestamp("us"))
+
+
+def _coagir(lote, coluna_data):
+    # 🔹 valor e data convertidos bloco a bloco, durante a leitura
+    colunas = dict(zip(lote.schema.names, lote.columns))
+
+    if "valor" in colunas:
+        colunas["valor"] = _numero(colunas["valor"])
+    if coluna_data in colunas:
+        colunas[coluna_data] = _data(colunas[coluna_data])
+
+    return pa.RecordBatch.from_arrays(list(colunas.values()), names=list(colunas))
+
+
+def ler_csv_arrow(pedacos, tipos=None, coluna_data=None):
+    pedacos = iter(pedacos)
+    nomes, inicio = _ler_cabecalho(pedacos)
+    if not nomes:
+        return None
+
+    # 🔹 Sem inferência: texto continua texto (ex.: pcontas "001"); só as colunas declaradas
+    # na definição do dataset saem tipadas, e valor/data passam pela coerção acima
+    tipos = tipos or {}
+    tipos_colunas = {
+        nome: pa.type_for_alias(tipos[nome]) if nome in tipos else pa.string()
+        for nome in nomes
+    }
+
+    leitor = pacsv.open_csv(
+        io.BufferedReader(_FluxoResposta(pedacos, inicio), buffer_size=BLOCO_CSV),
+        read_options=pacsv.ReadOptions(block_size=BLOCO_CSV),
+        convert_options=pacsv.ConvertOptions(
+            column_types=tipos_colunas,
+            null_values=[""],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False
+        )
+    )
+
+    lotes = [pa.Table.from_batches([_coagir(lote, coluna_data)]) for lote in leitor]
+    if not lotes:
+        return None
+
+    return pa.concat_tables(lotes, promote_options="permissive")
+
+
+class RespostaCSV:
+
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+
+
+def _total(content_range):
+    # 🔹 Content-Range do PostgREST: "0-999/12345" (ou "*/0" sem linhas)
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+class FonteCSV:
+
+    def __init__(self, cliente_http, url, chave, tipos=None, coluna_data=None):
+        self.http = cliente_http
+        self.url_rest = f"{url.rstrip('/')}/rest/v1"
+        self.tipos = tipos
+        self.coluna_data = coluna_data
+        self.cabecalhos = {
+            "apikey": chave,
+            "Authorization": f"Bearer {chave}",
+            "Accept": "text/csv",
+        }
+
+    def buscar_pagina(self, view, inicio, tamanho, coluna_ordem=None, contar=False, desde=None):
+        parametros = {"select": "*"}
+
+        if desde:
+            parametros[desde[0]] = f"gt.{desde[1]}"
+        if coluna_ordem:
+            parametros["order"] = coluna_ordem
+
+        cabecalhos = {
+            **self.cabecalhos,
+            "Range-Unit": "items",
+            "Range": f"{inicio}-{inicio + tamanho - 1}",
+        }
+        if contar:
+            cabecalhos["Prefer"] = "count=exact"
+
+        t0 = time.perf_counter()
+
+        with self.http.stream("GET", f"{self.url_rest}/{view}", params=parametros, headers=cabecalhos) as resposta:
+            # 🔹 416: faixa além do fim (view vazia ou encolheu entre as páginas)
+            if resposta.status_code == 416:
+                return RespostaCSV(None, _total(resposta.headers.get("content-range"))), time.perf_counter() - t0
+
+            resposta.raise_for_status()
+            tabela = ler_csv_arrow(resposta.iter_bytes(), self.tipos, self.coluna_data)
+            total = _total(resposta.headers.get("content-range"))
+
+        return RespostaCSV(tabela, total), time.perf_counter() - t0
+
+    def juntar(self, paginas):
+        tabelas = [pagina for pagina in paginas if isinstance(pagina, pa.Table) and pagina.num_rows]
+        if not tabelas:
+            return pd.DataFrame()
+
+        # 🔹 Conversão única para pandas no fim; self_destruct libera cada coluna Arrow
+        # assim que ela é copiada, para o pico de memória não somar os dois formatos
+        tabela = pa.concat_tables(tabelas, promote_options="permissive")
+        return tabela.to_pandas(self_destruct=True, split_blocks=True)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# COMPARATIVO META x ATUAL (VETORIZADO)
+# ==============================
+
+def comparar_meta_atual(df, coluna_meta, coluna_atual, atingimento=False):
+    meta = df[coluna_meta].to_numpy(dtype="float64")
+    atual = df[coluna_atual].to_numpy(dtype="float64")
+
+    # 🔹 Divisão protegida: meta zero vira 0%, como no cálculo linha a linha
+    with np.errstate(divide="ignore", invalid="ignore"):
+        colunas = {
+            "Diferenca_R$": atual - meta,
+            "Variação_%": np.where(meta != 0, ((atual - meta) / meta) * 100, 0.0),
+        }
+        if atingimento:
+            colunas["Atingimento_%"] = np.where(meta != 0, (atual / meta) * 100, 0.0)
+
+    return df.assign(**colunas)
+
+
+# ==============================
+# META x ATUAL: SOMA ATUAL, MERGE E COMPARATIVO (PANDAS)
+# ==============================
+
+def meta_vs_atual(df_meta, base_atual, chaves, coluna_meta, coluna_atual,
+                  preencher_meta=False, atingimento=False, status=False):
+    atual = (
+        base_atual
+        .groupby(chaves, as_index=False, observed=True)
+        ["valor"]
+        .sum()
+        .rename(columns={"valor": coluna_atual})
+    )
+
+    df_final = df_meta.merge(atual, on=chaves, how="outer")
+
+    # 🔹 Status do grupo = status do primeiro lançamento (ordem original da carga)
+    if status:
+        df_status = (
+            base_atual
+            .sort_values("primeira_linha")
+            .groupby(chaves, observed=True)["status"]
+            .first()
+            .reset_index()
+        )
+        df_final = df_final.merge(df_status, on=chaves, how="left")
+
+    df_final[coluna_atual] = df_final[coluna_atual].fillna(0)
+    if preencher_meta:
+        df_final[coluna_meta] = df_final[coluna_meta].fillna(0)
+
+    return comparar_meta_atual(df_final, coluna_meta, coluna_atual, atingimento=atingimento)
+
+
+# ==============================
+# PARIDADE ENTRE MOTORES
+# ==============================
+
+def diferenca_resultados(obtido, esperado, rtol=None, atol=None):
+    # 🔹 Sem tolerância: bit a bit. Com rtol/atol: só as colunas numéricas podem diferir
+    # até esse limite (soma em outra ordem/algoritmo); chaves, dtypes e ordem seguem exatos
+    exato = rtol is None and atol is None
+    tolerancias = {} if exato else {"rtol": rtol or 0.0, "atol": atol or 0.0}
+
+    try:
+        pd.testing.assert_frame_equal(
+            obtido.reset_index(drop=True),
+            esperado.reset_index(drop=True),
+            check_exact=exato,
+            **tolerancias
+        )
+    except AssertionError as erro:
+        return str(erro)
+    return None
@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from collections import Counter, deque
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
+
+# ==============================
+# CLIENTE HTTP COMPARTILHADO (POOL, KEEP-ALIVE, RETENTATIVAS)
+# ==============================
+
+# 🔹 Falhas passageiras do gateway/PostgREST; só métodos sem efeito colateral são repetidos.
+# Inclui o 520 (erro genérico do proxy na frente do Supabase), que o postgrest-py repetia
+# por conta própria antes de a retentativa dele ser desligada em bi/carga
+STATUS_TRANSITORIOS = {429, 502, 503, 504, 520}
+METODOS_REPETIVEIS = {"GET", "HEAD", "OPTIONS"}
+
+
+class MetricasHttp:
+
+    def __init__(self, max_amostras=1000):
+        self._lock = threading.Lock()
+        self._latencias = deque(maxlen=max_amostras)
+        self.requisicoes = 0
+        self.conexoes = 0
+        self.handshakes_tls = 0
+        self.retentativas = 0
+        self.erros = 0
+        self.protocolos = Counter()
+
+    def contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def rastrear(self, evento, info):
+        # 🔹 Eventos do httpcore: só conexão nova passa por connect_tcp / start_tls
+        if evento == "connection.connect_tcp.complete":
+            self.contar("conexoes")
+        elif evento == "connection.start_tls.complete":
+            self.contar("handshakes_tls")
+
+    def registrar_resposta(self, resposta):
+        # 🔹 Hook de resposta do httpx: protocolo realmente negociado com o servidor
+        # ("HTTP/1.1" ou "HTTP/2"), não só o que o cliente aceita
+        with self._lock:
+            self.protocolos[resposta.http_version] += 1
+
+    def registrar(self, segundos):
+        with self._lock:
+            self.requisicoes += 1
+            self._latencias.append(segundos)
+
+    def estatisticas(self):
+        with self._lock:
+            latencias = sorted(self._latencias)
+            requisicoes = self.requisicoes
+            conexoes = self.conexoes
+
+            def percentil(p):
+                return latencias[min(len(latencias) - 1, int(p * len(latencias)))] if latencias else 0.0
+
+            return {
+                "requisicoes": requisicoes,
+                "conexoes": conexoes,
+                "handshakes_tls": self.handshakes_tls,
+                "reaproveitamento": 1 - conexoes / requisicoes if requisicoes else 0.0,
+                "retentativas": self.retentativas,
+                "erros": self.erros,
+                "latencia_p50": percentil(0.50),
+                "latencia_p95": percentil(0.95),
+                "protocolos": dict(self.protocolos),
+            }
+
+
+def _espera_retry_after(resposta):
+    valor = resposta.headers.get("retry-after", "")
+    return float(valor) if valor.replace(".", "", 1).isdigit() else None
+
+
+class TransporteResiliente(httpx.BaseTransport):
+
+    def __init__(self, transporte, metricas, tentativas=3, espera_base=0.5, espera_max=8.0):
+        self.transporte = transporte
+        self.metricas = metricas
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+
+    def _esperar(self, tentativa, sugerida=None):
+        # 🔹 Backoff exponencial com jitter; Retry-After do servidor tem prioridade
+        espera = sugerida if sugerida is not None else self.espera_base * 2 ** tentativa
+        time.sleep(min(self.espera_max, espera) * (0.5 + random.random() / 2))
+
+    def handle_request(self, request):
+        request.extensions["trace"] = self.metricas.rastrear
+        repetivel = request.method in METODOS_REPETIVEIS
+
+        for tentativa in range(self.tentativas + 1):
+            ultima = tentativa == self.tentativas or not repetivel
+            t0 = time.perf_counter()
+
+            try:
+                resposta = self.transporte.handle_request(request)
+            except httpx.TransportError:
+                self.metricas.contar("erros")
+                if ultima:
+                    raise
+                sugerida = None
+            else:
+                # 🔹 Latência até os cabeçalhos: corpo em streaming (CSV) é lido depois por quem chamou
+                self.metricas.registrar(time.perf_counter() - t0)
+                if ultima or resposta.status_code not in STATUS_TRANSITORIOS:
+                    return resposta
+                sugerida = _espera_retry_after(resposta)
+                # 🔹 Lê o corpo (pequeno) antes de fechar: resposta não consumida descarta a conexão
+                resposta.read()
+                resposta.close()
+
+            self.metricas.contar("retentativas")
+            self._esperar(tentativa, sugerida)
+
+    def close(self):
+        self.transporte.close()
+
+
+class ConexaoHttp:
+
+    # 🔹 Um pool por processo: sessões e reruns reaproveitam conexões (e o TLS) já abertas
+    def __init__(self, timeout=60, timeout_conexao=10, max_conexoes=20, max_keepalive=20,
+                 keepalive_expira=120, tentativas=3, http2=True, espera_base=0.5):
+        self.metricas = MetricasHttp()
+        # 🔹 Só habilita a negociação (ALPN); o protocolo usado de fato vem das respostas
+        self.http2 = http2 and HTTP2_DISPONIVEL
+
+        transporte = httpx.HTTPTransport(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_conexoes,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expira
+            )
+        )
+
+        self.cliente = httpx.Client(
+            transport=TransporteResiliente(transporte, self.metricas, tentativas=tentativas, espera_base=espera_base),
+            timeout=httpx.Timeout(timeout, connect=timeout_conexao),
+            headers={"Accept-Encoding": "gzip"},
+            event_hooks={"response": [self.metricas.registrar_resposta]}
+        )
+
+    def estatisticas(self):
+        estatisticas = self.metricas.estatisticas()
+        return {
+            **estatisticas,
+            "http2": estatisticas["protocolos"].get("HTTP/2", 0) > 0,
+            "http2_habilitado": self.http2,
+        }
+
+    def fechar(self):
+        self.cliente.close()
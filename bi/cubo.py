@@ -0,0 +1,25 @@
+import numpy as np
+
+
+# ==============================
+# CUBO PRÉ-AGREGADO (MENOR GRÃO DAS DIMENSÕES)
+# ==============================
+
+def montar_cubo(df, dimensoes, medida="valor"):
+    # 🔹 Soma da medida por combinação de dimensões; as visões somam o cubo, não as linhas.
+    # primeira_linha guarda a posição original para reproduzir o "first()" das linhas brutas
+    # 🔹 Frame já agregado no servidor traz "linhas": soma as contagens em vez de contar grupos
+    contagem = ("linhas", "sum") if "linhas" in df.columns else (medida, "size")
+
+    cubo = (
+        df.assign(_linha=np.arange(len(df)))
+        .groupby(dimensoes, observed=True, dropna=False)
+        .agg(
+            **{medida: (medida, "sum")},
+            linhas=contagem,
+            primeira_linha=("_linha", "min"),
+        )
+        .reset_index()
+    )
+
+    return cubo
@@ -0,0 +1,151 @@
+import os
+
+import httpx
+
+from bi.agregacao import AgregadorRPC, AgregadorSQLite, carregar_agregado
+from bi.cache import CacheDataset
+from bi.carga_csv import FonteCSV
+from bi.sincronizacao import SincronizadorView
+from bi.snapshot_local import abrir_snapshot, salvar_snapshot
+from bi.tratamento import VERSAO_ESQUEMA, aplicar_esquema, tratar_dataset
+from bi.tratamento_polars import tratar_dataset_polars
+
+
+# ==============================
+# DEFINIÇÃO DECLARATIVA DOS DATASETS
+# ==============================
+
+class DefinicaoDataset:
+
+    def __init__(self, nome, view, coluna_data, dimensoes, dimensoes_cubo, dimensoes_filtro,
+                 renomear=None, exclusoes=None, garantir=None, preencher=None,
+                 chave="id", coluna_alteracao="updated_at", funcao_agregacao=None, tipos=None):
+        self.nome = nome
+        self.view = view
+        self.coluna_data = coluna_data
+        self.dimensoes = dimensoes
+        self.dimensoes_cubo = dimensoes_cubo
+        self.dimensoes_filtro = dimensoes_filtro
+        self.renomear = renomear or {}
+        self.exclusoes = exclusoes or []
+        self.garantir = garantir or {}
+        self.preencher = preencher or {}
+        self.chave = chave
+        self.coluna_alteracao = coluna_alteracao
+        self.funcao_agregacao = funcao_agregacao
+        # 🔹 Tipos das colunas não-texto usadas no tratamento (carga em CSV não tem tipos)
+        self.tipos = tipos or {}
+
+    @property
+    def grao_agregado(self):
+        # 🔹 Menor grão pedido ao servidor: cubo + semana ISO (a visão semanal sai do mesmo frame)
+        return self.dimensoes_cubo + ["semana_iso"]
+
+    def tratar(self, df):
+        return tratar_dataset(df, self)
+
+    def tratar_polars(self, df):
+        return tratar_dataset_polars(df, self)
+
+    def tipar(self, df):
+        return aplicar_esquema(df, self.dimensoes)
+
+    def caminho_snapshot(self, pasta, agregacao="linhas"):
+        sufixo = "" if agregacao == "linhas" else ".agregado"
+        return os.path.join(pasta, f"{self.view}{sufixo}.v{VERSAO_ESQUEMA}.arrow")
+
+
+# 🔹 Contas a pagar/receber por vencimento (BI_PYTHON.py)
+CONTAS_PAGAR = DefinicaoDataset(
+    nome="contas_pagar",
+    view="vw_fcontas_geral_py",
+    coluna_data="dt_vencimento",
+    dimensoes=["razao", "filial", "pcontas", "status", "movimento"],
+    dimensoes_cubo=["razao", "filial", "status", "pcontas", "movimento", "ano", "mes", "nome_mes", "mes_ano"],
+    dimensoes_filtro=["ano", "nome_mes", "razao", "filial", "movimento", "status", "pcontas"],
+    exclusoes=[("id_empresa", "!=", 7), ("status", "!=", "Cancelado")],
+    garantir={"razao": "Não informado"},
+    preencher={"filial": "Não informado", "pcontas": "Não informado", "status": "Não informado"},
+    funcao_agregacao="bi_agregar_contas",
+    tipos={"id": "int64", "id_empresa": "int64"},
+)
+
+# 🔹 Movimentações por lançamento (README.md/BI_PYTHON.py); fornecedor vira filial
+CONTAS_MOVIMENTO = DefinicaoDataset(
+    nome="contas_movimento",
+    view="vw_contas_movimento",
+    coluna_data="dt_lancamento",
+    dimensoes=["grupo", "filial", "pcontas", "tipo_conta", "movimento"],
+    dimensoes_cubo=["grupo", "filial", "tipo_conta", "pcontas", "movimento", "ano", "mes", "nome_mes", "mes_ano"],
+    dimensoes_filtro=["ano", "nome_mes", "grupo", "filial", "movimento", "tipo_conta", "pcontas"],
+    renomear={"fornecedor": "filial"},
+    preencher={"grupo": "Não informado", "filial": "Não informado", "pcontas": "Não informado", "tipo_conta": "Não informado"},
+    tipos={"id": "int64"},
+)
+
+
+# ==============================
+# CARGA EM CACHE A PARTIR DA DEFINIÇÃO
+# ==============================
+
+def criar_cache(cliente, definicao, pasta_snapshots, ttl=600, tamanho_pagina=1000, max_workers=8,
+                reconciliar_a_cada=None, offline=False, agregacao="linhas",
+                tratamento="pandas", ingestao="json", cliente_http=None,
+                url=None, chave_api=None):
+    # 🔹 tratamento="polars": limpeza lazy e multi-thread no Polars (paridade com o pandas
+    # coberta por tests/test_tratamento_polars.py)
+    tratar = definicao.tratar_polars if tratamento == "polars" else definicao.tratar
+
+    # 🔹 ingestao="csv": páginas em text/csv lidas direto para Arrow, sem um dict por linha
+    fonte = None
+    if ingestao == "csv":
+        fonte = FonteCSV(
+            cliente_http or httpx.Client(timeout=60),
+            url,
+            chave_api,
+            tipos=definicao.tipos,
+            coluna_data=definicao.coluna_data
+        )
+
+    sincronizador = SincronizadorView(
+        cliente,
+        definicao.view,
+        tratar,
+        chave=definicao.chave,
+        coluna_alteracao=definicao.coluna_alteracao,
+        tamanho_pagina=tamanho_pagina,
+        max_workers=max_workers,
+        esquema=definicao.tipar,
+        fonte=fonte
+    )
+    caminho = definicao.caminho_snapshot(pasta_snapshots, agregacao)
+    carregar = sincronizador.carregar_completo
+    atualizar = sincronizador.carregar_alteracoes
+
+    # 🔹 agregacao="rpc": só os grupos do cubo atravessam a rede (sem delta, recarga por TTL);
+    # "sqlite": mesma consulta rodando localmente sobre as linhas, para conferir a paridade
+    if agregacao == "rpc":
+        if definicao.funcao_agregacao is None:
+            raise ValueError(f"Dataset {definicao.nome} não tem função de agregação no servidor.")
+
+        agregador = AgregadorRPC(cliente, definicao.funcao_agregacao)
+        carregar = lambda: carregar_agregado(agregador, definicao.grao_agregado, definicao.tipar)
+        atualizar = None
+    elif agregacao == "sqlite":
+        colunas = [definicao.chave, "valor"] + definicao.grao_agregado
+        carregar = lambda: carregar_agregado(
+            AgregadorSQLite(sincronizador.carregar_completo().df, colunas),
+            definicao.grao_agregado,
+            definicao.tipar
+        )
+        atualizar = None
+
+    return CacheDataset(
+        carregar,
+        ttl=ttl,
+        atualizar=atualizar,
+        reconciliar_a_cada=reconciliar_a_cada,
+        abrir_local=lambda: abrir_snapshot(caminho),
+        salvar_local=lambda snapshot: salvar_snapshot(caminho, snapshot),
+        offline=offline
+    )
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# ESTILO CONDICIONAL POR SINAL (VETORIZADO)
+# ==============================
+
+def _juntar_css(a, b):
+    # 🔹 "; " separa as regras; o Styler ignora pedaços vazios ao interpretar o CSS
+    return np.where(a == "", b, np.where(b == "", a, a + "; " + b))
+
+
+def estilos_por_sinal(df, regras, destaque=None):
+    estilos = np.full(df.shape, "", dtype=object)
+
+    for coluna, regra in regras.items():
+        if coluna not in df.columns:
+            continue
+
+        valores = pd.to_numeric(df[coluna], errors="coerce").to_numpy(dtype="float64")
+        i = df.columns.get_loc(coluna)
+
+        # 🔹 Mesma ordem dos if/elif originais: positivo, negativo, zero e, por fim, vazio (NaN)
+        estilos[:, i] = np.select(
+            [valores > 0, valores < 0, valores == 0],
+            [regra.get("positivo", ""), regra.get("negativo", ""), regra.get("zero", "")],
+            default=regra.get("nulo", "")
+        )
+
+    # 🔹 Destaque de linha inteira (ex.: TOTAL GERAL) somado ao estilo da célula
+    if destaque is not None:
+        linhas, css = destaque
+        linhas = np.asarray(linhas, dtype=bool)
+        estilos[linhas] = _juntar_css(estilos[linhas].astype(str), css)
+
+    return pd.DataFrame(estilos, index=df.index, columns=df.columns)
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# ÍNDICE DE BITMAPS PARA OS FILTROS EM CASCATA
+# ==============================
+
+class _Dimensao:
+
+    def __init__(self, serie, n_linhas):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos = serie.cat.codes.to_numpy()
+            valores = list(serie.cat.categories)
+        else:
+            codigos, uniques = pd.factorize(serie, sort=True)
+            valores = list(uniques)
+
+        self.valores = valores
+        self.codigos = codigos
+        self.posicao = {valor: i for i, valor in enumerate(valores)}
+
+        # 🔹 Um bitmap (bits empacotados) por valor: linha i ligada se tem o valor
+        n_bytes = (n_linhas + 7) // 8
+        self.bitmaps = np.zeros((len(valores), n_bytes), dtype=np.uint8)
+
+        linhas = np.flatnonzero(codigos >= 0)
+        np.bitwise_or.at(
+            self.bitmaps,
+            (codigos[linhas], linhas >> 3),
+            (128 >> (linhas & 7)).astype(np.uint8)
+        )
+
+        self.contagem = np.bincount(codigos[linhas], minlength=len(valores))
+
+
+class IndiceFiltros:
+
+    # 🔹 Acima disso, contar códigos nas linhas do filtro sai mais barato que AND por valor
+    LIMITE_VALORES_BITMAP = 64
+
+    def __init__(self, df, dimensoes):
+        self.n_linhas = len(df)
+        self._dims = {col: _Dimensao(df[col], self.n_linhas) for col in dimensoes}
+
+    def mascara(self, selecoes):
+        # 🔹 OR entre os valores de uma dimensão, AND entre dimensões; None = sem filtro
+        resultado = None
+
+        for col, sel in selecoes.items():
+            if not sel:
+                continue
+
+            dim = self._dims[col]
+            codigos = [dim.posicao[v] for v in sel if v in dim.posicao]
+
+            if codigos:
+                bits = np.bitwise_or.reduce(dim.bitmaps[codigos], axis=0)
+            else:
+                bits = np.zeros(dim.bitmaps.shape[1], dtype=np.uint8)
+
+            resultado = bits if resultado is None else np.bitwise_and(resultado, bits)
+
+        return resultado
+
+    @staticmethod
+    def combinar(*mascaras):
+        resultado = None
+        for m in mascaras:
+            if m is not None:
+                resultado = m if resultado is None else np.bitwise_and(resultado, m)
+        return resultado
+
+    def linhas(self, mascara):
+        if mascara is None:
+            return np.arange(self.n_linhas)
+        return np.flatnonzero(np.unpackbits(mascara, count=self.n_linhas))
+
+    def opcoes(self, col, mascara=None):
+        dim = self._dims[col]
+
+        if mascara is None:
+            presentes = dim.contagem > 0
+        elif len(dim.valores) <= self.LIMITE_VALORES_BITMAP:
+            presentes = np.bitwise_and(dim.bitmaps, mascara).any(axis=1)
+        else:
+            codigos = dim.codigos[self.linhas(mascara)]
+            presentes = np.bincount(codigos[codigos >= 0], minlength=len(dim.valores)) > 0
+
+        return [dim.valores[i] for i in np.flatnonzero(presentes)]
+
+    def selecionar(self, df, mascara):
+        # 🔹 Sem filtro devolve o próprio frame: nada de cópia
+        if mascara is None:
+            return df
+        return df.iloc[self.linhas(mascara)]
+
+
+# ==============================
+# PLANO DE FILTROS (MÁSCARAS REAPROVEITADAS NO RERUN)
+# ==============================
+
+class PlanoFiltros:
+
+    def __init__(self, indice, df):
+        self.indice = indice
+        self.df = df
+        self._por_dimensao = {}
+        self._mascaras = {}
+        self._frames = {}
+
+    @staticmethod
+    def _chave(selecoes):
+        # 🔹 Cada dicionário é um conjunto de filtros; vários dicionários entram em AND
+        # (ex.: filtros globais + movimento fixo da aba, mesmo que a coluna se repita).
+        # Seleção vazia = sem filtro; a ordem dos valores não muda a máscara
+        return tuple(sorted({
+            (col, tuple(sorted(set(sel), key=str)))
+            for s in selecoes
+            for col, sel in s.items()
+            if sel
+        }))
+
+    def _mascara_dimensao(self, col, valores):
+        if (col, valores) not in self._por_dimensao:
+            self._por_dimensao[(col, valores)] = self.indice.mascara({col: list(valores)})
+        return self._por_dimensao[(col, valores)]
+
+    def mascara(self, *selecoes):
+        chave = self._chave(selecoes)
+        if chave not in self._mascaras:
+            self._mascaras[chave] = self.indice.combinar(
+                *(self._mascara_dimensao(col, valores) for col, valores in chave)
+            )
+        return self._mascaras[chave]
+
+    def frame(self, *selecoes):
+        # 🔹 Mesma combinação pedida por várias abas/blocos: um único iloc por rerun
+        chave = self._chave(selecoes)
+        if chave not in self._frames:
+            self._frames[chave] = self.indice.selecionar(self.df, self.mascara(*selecoes))
+        return self._frames[chave]
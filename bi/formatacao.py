@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# FORMATAÇÃO DE MOEDA (R$)
+# ==============================
+
+def formatar_real(valor):
+    if pd.isna(valor):
+        return ""
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+# 🔹 Acima disso valor * 100 deixa de ser inteiro exato em float64
+_LIMITE_CENTAVOS = 2.0 ** 52
+
+
+def _agrupar_milhares(inteiros, resto):
+    # 🔹 Monta os caracteres como códigos numa matriz (linha x posição), sem str por valor
+    n_digitos = 1
+    while n_digitos < 19 and (inteiros >= 10 ** n_digitos).any():
+        n_digitos += 1
+    n_digitos = -(-n_digitos // 3) * 3
+
+    potencias = 10 ** np.arange(n_digitos - 1, -1, -1, dtype=np.int64)
+    digitos = (inteiros[:, None] // potencias) % 10
+    tamanho = 1 + (inteiros[:, None] >= potencias[:-1][::-1][None, :]).sum(axis=1)
+
+    codigos = (digitos + ord("0")).astype(np.uint32)
+    codigos[np.arange(n_digitos)[None, :] < (n_digitos - tamanho)[:, None]] = ord(" ")
+
+    # 🔹 Blocos de 3 dígitos com "." entre eles; o ponto some se o bloco à esquerda é vazio
+    blocos = codigos.reshape(len(inteiros), n_digitos // 3, 3)
+    pontos = np.where(blocos[:, :, 2:] == ord(" "), ord(" "), ord(".")).astype(np.uint32)
+    agrupado = np.concatenate([blocos, pontos], axis=2).reshape(len(inteiros), -1)[:, :-1]
+
+    centavos = np.stack([np.full(len(resto), ord(","), dtype=np.uint32), resto // 10 + ord("0"), resto % 10 + ord("0")], axis=1)
+    linhas = np.ascontiguousarray(np.concatenate([agrupado, centavos.astype(np.uint32)], axis=1))
+
+    return np.char.lstrip(linhas.view(f"U{linhas.shape[1]}").ravel(), " ")
+
+
+def formatar_reais(valores):
+    valores = pd.to_numeric(pd.Series(valores), errors="coerce").to_numpy(dtype="float64")
+    saida = np.full(len(valores), "", dtype=object)
+
+    if len(valores) == 0:
+        return saida
+
+    validos = ~np.isnan(valores)
+    x = np.abs(np.where(validos, valores, 0.0)) * 100
+
+    # 🔹 Perto de ...,xx5 o arredondamento de valor * 100 pode divergir do f-string
+    with np.errstate(invalid="ignore"):
+        fracao = x - np.floor(x)
+    quase_empate = np.abs(fracao - 0.5) <= 1e-6 + x * 2.3e-16
+    fallback = validos & (~np.isfinite(x) | (x >= _LIMITE_CENTAVOS) | quase_empate)
+    rapidos = validos & ~fallback
+
+    if rapidos.any():
+        centavos = np.rint(x[rapidos]).astype(np.int64)
+        inteiros, resto = np.divmod(centavos, 100)
+
+        sinal = np.where(np.signbit(valores[rapidos]), "R$ -", "R$ ")
+        saida[rapidos] = np.char.add(sinal, _agrupar_milhares(inteiros, resto)).astype(object)
+
+    for i in np.flatnonzero(fallback):
+        saida[i] = formatar_real(valores[i])
+
+    return saida
+
+
+class _TextosReais(dict):
+
+    # 🔹 NaN nunca casa com a chave (nan != nan) e vira ""; qualquer outro valor fora do
+    # dicionário é formatado na hora, em vez de sair como célula vazia
+    def __missing__(self, valor):
+        return formatar_real(valor)
+
+
+def formatador_reais(*colunas):
+    valores = pd.concat([pd.Series(c, dtype="float64") for c in colunas], ignore_index=True)
+    # 🔹 0.0 e -0.0 colidem no dicionário; nesse caso formata célula a célula
+    if (np.signbit(valores.to_numpy()) & (valores.to_numpy() == 0)).any():
+        return formatar_real
+
+    valores = valores.dropna().drop_duplicates()
+
+    return _TextosReais(zip(valores.tolist(), formatar_reais(valores))).__getitem__
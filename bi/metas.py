@@ -0,0 +1,149 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# MATRIZ GRUPO x MÊS PARA AS METAS (MÉDIA POR MÊS/ANO)
+# ==============================
+
+class MatrizMensal:
+
+    def __init__(self, base, grupos):
+        por_mes = base.groupby(grupos + ["mes_ano"], observed=True)["valor"].sum()
+
+        # 🔹 Saída do groupby já vem ordenada: ordem de aparição = ordem dos grupos
+        indice_grupos = por_mes.index.droplevel("mes_ano")
+        codigos_grupo, _ = pd.factorize(indice_grupos)
+        _, primeiras = np.unique(codigos_grupo, return_index=True)
+        self.grupos = indice_grupos[primeiras].to_frame(index=False)
+
+        meses = por_mes.index.get_level_values("mes_ano").astype(str)
+        self.meses = sorted(set(meses))
+        self.posicao_mes = {mes: i for i, mes in enumerate(self.meses)}
+        codigos_mes = np.array([self.posicao_mes[m] for m in meses], dtype=np.int64)
+
+        formato = (len(self.grupos), len(self.meses))
+        self.soma = np.zeros(formato)
+        self.presenca = np.zeros(formato, dtype=np.int64)
+        self.soma[codigos_grupo, codigos_mes] = por_mes.to_numpy(dtype="float64")
+        self.presenca[codigos_grupo, codigos_mes] = 1
+
+        # 🔹 Somas acumuladas por mês: qualquer janela contínua sai de duas colunas
+        self.soma_acum = np.zeros((formato[0], formato[1] + 1))
+        self.presenca_acum = np.zeros((formato[0], formato[1] + 1), dtype=np.int64)
+        np.cumsum(self.soma, axis=1, out=self.soma_acum[:, 1:])
+        np.cumsum(self.presenca, axis=1, out=self.presenca_acum[:, 1:])
+
+    def __len__(self):
+        return self.soma.size
+
+    def janela(self, inicio, fim):
+        total = self.soma_acum[:, fim + 1] - self.soma_acum[:, inicio]
+        meses = self.presenca_acum[:, fim + 1] - self.presenca_acum[:, inicio]
+        return total, meses
+
+    def totais(self, meses=None):
+        if not meses:
+            return self.janela(0, len(self.meses) - 1)
+
+        colunas = sorted({self.posicao_mes[m] for m in map(str, meses) if m in self.posicao_mes})
+        if not colunas:
+            return np.zeros(len(self.grupos)), np.zeros(len(self.grupos), dtype=np.int64)
+
+        # 🔹 Seleção contínua (presets "últimos N meses"): O(grupos) pelas somas acumuladas
+        if colunas[-1] - colunas[0] + 1 == len(colunas):
+            return self.janela(colunas[0], colunas[-1])
+
+        return self.soma[:, colunas].sum(axis=1), self.presenca[:, colunas].sum(axis=1)
+
+    def meta(self, meses, coluna_total, coluna_meses, coluna_meta):
+        total, qtd_meses = self.totais(meses)
+
+        # 🔹 Grupo sem lançamento na janela não entra, como no groupby filtrado
+        ativos = qtd_meses > 0
+        df_meta = self.grupos[ativos].reset_index(drop=True)
+        df_meta[coluna_total] = total[ativos]
+        df_meta[coluna_meses] = qtd_meses[ativos]
+        df_meta[coluna_meta] = df_meta[coluna_total] / df_meta[coluna_meses]
+        return df_meta
+
+
+def ultimos_meses(opcoes, n, hoje=None):
+    # 🔹 Âncora no calendário, não nos dados: a base é dt_vencimento e vai até meses futuros
+    # (contas ainda a pagar). Janela = N meses corridos até o último mês fechado
+    fim = pd.Timestamp(hoje if hoje is not None else pd.Timestamp.today()).to_period("M") - 1
+    janela = {str(mes) for mes in pd.period_range(end=fim, periods=n, freq="M")}
+    return [mes for mes in sorted(opcoes) if str(mes) in janela]
+
+
+def chave_meta(versao, filtros, movimento, grupos):
+    # 🔹 Ordem de seleção não muda o isin: normaliza para combinações iguais caírem na mesma chave
+    filtros = tuple(
+        (col, tuple(sorted(map(str, sel))))
+        for col, sel in sorted(filtros.items())
+        if sel
+    )
+    return (versao, filtros, movimento, tuple(grupos))
+
+
+# ==============================
+# MEMO LRU COMPARTILHADO ENTRE SESSÕES
+# ==============================
+
+class MemoMetas:
+
+    def __init__(self, max_entradas=256, max_linhas=2_000_000):
+        self.max_entradas = max_entradas
+        self.max_linhas = max_linhas
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._linhas = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave, calcular):
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return self._entradas[chave]
+            self.falhas += 1
+
+        # 🔹 Calcula fora do lock; duas sessões na mesma chave só repetem o trabalho
+        resultado = calcular()
+
+        with self._lock:
+            if chave not in self._entradas:
+                self._entradas[chave] = resultado
+                self._linhas += len(resultado)
+                self._descartar()
+
+        return resultado
+
+    def _descartar(self):
+        while self._entradas and (
+            len(self._entradas) > self.max_entradas or self._linhas > self.max_linhas
+        ):
+            _, antigo = self._entradas.popitem(last=False)
+            self._linhas -= len(antigo)
+            self.descartes += 1
+
+    @property
+    def taxa_acerto(self):
+        consultas = self.acertos + self.falhas
+        return self.acertos / consultas if consultas else 0.0
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "linhas": self._linhas,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "descartes": self.descartes,
+                "taxa_acerto": self.taxa_acerto,
+            }
@@ -0,0 +1,123 @@
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+# ==============================
+# MOTOR DUCKDB (SQL COLUNAR EM PROCESSO, MULTI-CORE)
+# ==============================
+
+# 🔹 fsum (soma compensada do DuckDB, em paralelo e em outra ordem) e a soma do groupby do
+# pandas não dão o mesmo float64: diferem nos últimos bits (ex.: -1116.3899999999996 x
+# -1116.3899999999999). Paridade com o pandas vale até esta tolerância, não bit a bit
+TOLERANCIA_RELATIVA = 1e-9
+TOLERANCIA_ABSOLUTA = 1e-6
+
+def _coluna(nome):
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def _valores(selecao):
+    # 🔹 Inteiros do numpy (ex.: ano) viram int do Python para o bind de parâmetros
+    return [v.item() if hasattr(v, "item") else v for v in selecao]
+
+
+class MotorDuckDB:
+
+    def __init__(self, cubo, threads=None):
+        if duckdb is None:
+            raise ImportError("BI_MOTOR=duckdb exige o pacote duckdb (pip install -r requirements-motores.txt).")
+
+        self.cubo = cubo
+        self.conexao = duckdb.connect(":memory:")
+        if threads:
+            self.conexao.execute(f"SET threads = {int(threads)}")
+
+    def _where(self, selecoes):
+        condicoes, parametros = [], []
+
+        # 🔹 Mesma regra do PlanoFiltros: seleções combinadas com AND, lista vazia não filtra
+        for selecao in selecoes:
+            for col, valores in selecao.items():
+                if not valores:
+                    continue
+                condicoes.append(f"{_coluna(col)}::VARCHAR IN (SELECT unnest(?::VARCHAR[]))")
+                parametros.append([str(v) for v in _valores(valores)])
+
+        return (" AND ".join(condicoes) or "TRUE"), parametros
+
+    def meta_vs_atual(self, df_meta, selecoes, chaves, coluna_meta, coluna_atual,
+                      preencher_meta=False, atingimento=False, status=False):
+        where, parametros = self._where(selecoes)
+        # 🔹 Como o groupby do pandas: grupo com chave nula fica de fora
+        where_chaves = " AND ".join(f"{_coluna(c)} IS NOT NULL" for c in chaves)
+        lista_chaves = ", ".join(_coluna(c) for c in chaves)
+        junta = " AND ".join(f"m.{_coluna(c)}::VARCHAR = a.{_coluna(c)}::VARCHAR" for c in chaves)
+
+        # 🔹 Colunas na ordem do merge do pandas: as da meta, depois o atual (e o status)
+        colunas = [
+            f"COALESCE(m.{_coluna(c)}::VARCHAR, a.{_coluna(c)}::VARCHAR) AS {_coluna(c)}"
+            if c in chaves else f"m.{_coluna(c)}"
+            for c in df_meta.columns
+        ]
+        colunas.append(f"COALESCE(a.atual, 0) AS {_coluna(coluna_atual)}")
+        if status:
+            colunas.append("a.status AS status")
+
+        meta = f"m.{_coluna(coluna_meta)}"
+        if preencher_meta:
+            colunas[list(df_meta.columns).index(coluna_meta)] = f"COALESCE({meta}, 0) AS {_coluna(coluna_meta)}"
+            meta = f"COALESCE({meta}, 0)"
+
+        atual = "COALESCE(a.atual, 0)"
+        # 🔹 Divisão protegida igual ao comparar_meta_atual: meta zero dá 0%, meta nula dá nulo
+        colunas.append(f"{atual} - {meta} AS \"Diferenca_R$\"")
+        colunas.append(f"CASE WHEN {meta} = 0 THEN 0.0 ELSE (({atual} - {meta}) / {meta}) * 100 END AS \"Variação_%\"")
+        if atingimento:
+            colunas.append(f"CASE WHEN {meta} = 0 THEN 0.0 ELSE ({atual} / {meta}) * 100 END AS \"Atingimento_%\"")
+
+        status_sql = ", arg_min(status, primeira_linha) AS status" if status else ""
+
+        sql = f"""
+            WITH atual AS (
+                SELECT {lista_chaves}, fsum(valor) AS atual{status_sql}
+                FROM cubo
+                WHERE {where} AND {where_chaves}
+                GROUP BY {lista_chaves}
+            )
+            SELECT {", ".join(colunas)}
+            FROM meta m
+            FULL OUTER JOIN atual a ON {junta}
+            ORDER BY {lista_chaves}
+        """
+
+        # 🔹 Cursor próprio por chamada: sessões do Streamlit consultam em paralelo
+        cursor = self.conexao.cursor()
+        try:
+            cursor.register("cubo", self.cubo)
+            cursor.register("meta", df_meta)
+            resultado = cursor.execute(sql, parametros).df()
+        finally:
+            cursor.close()
+
+        return self._tipar(resultado, df_meta, chaves, status)
+
+    def _tipar(self, resultado, df_meta, chaves, status):
+        # 🔹 Devolve as chaves (e o status) com o dtype do cubo, como sai do merge do pandas
+        for col in chaves + (["status"] if status else []):
+            resultado[col] = resultado[col].astype(self.cubo[col].dtype)
+
+        # 🔹 Demais colunas da meta: inteiro com lacuna do outer join vira float64 (NaN), como no pandas
+        for col in df_meta.columns:
+            if col in chaves:
+                continue
+            dtype = df_meta[col].dtype
+            if not isinstance(dtype, pd.CategoricalDtype) and resultado[col].isna().any():
+                dtype = "float64"
+            resultado[col] = resultado[col].astype(dtype)
+
+        return resultado
+
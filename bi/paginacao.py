@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# BUSCA, ORDENAÇÃO E PAGINAÇÃO EM PYTHON
+# ==============================
+
+def filtrar_texto(df, termo, colunas):
+    termo = (termo or "").strip().lower()
+    if not termo:
+        return df
+
+    achou = np.zeros(len(df), dtype=bool)
+
+    for col in colunas:
+        serie = df[col]
+
+        # 🔹 Categóricas: testa cada categoria uma vez e espalha pelos códigos
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            bate = serie.cat.categories.astype(str).str.lower().str.contains(termo, regex=False)
+            bate = np.append(np.asarray(bate, dtype=bool), False)
+            achou |= bate[serie.cat.codes.to_numpy()]
+        else:
+            achou |= serie.astype(str).str.lower().str.contains(termo, regex=False).to_numpy(dtype=bool)
+
+    return df[achou]
+
+
+def fatiar_pagina(df, pagina, tamanho, ordenar_por=None, decrescente=False):
+    total_paginas = max(1, -(-len(df) // tamanho))
+    pagina = min(max(int(pagina), 1), total_paginas)
+    inicio = (pagina - 1) * tamanho
+
+    if ordenar_por is not None:
+        df = df.sort_values(ordenar_por, ascending=not decrescente, kind="stable", na_position="last")
+
+    return df.iloc[inicio:inicio + tamanho], pagina, total_paginas
@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+import pyarrow as pa
+
+from bi.sincronizacao import SnapshotDados
+
+
+# ==============================
+# SNAPSHOT LOCAL (ARROW IPC, MAPEADO EM MEMÓRIA)
+# ==============================
+
+def salvar_snapshot(caminho, snapshot):
+    tabela = pa.Table.from_pandas(snapshot.df, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        b"marca": (snapshot.marca or "").encode(),
+    })
+
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+
+    # 🔹 Grava em arquivo temporário e troca de uma vez: quem está lendo o antigo não quebra.
+    # Nome único por gravação: dois processos (ou a verificação em segundo plano e uma carga)
+    # nunca escrevem no mesmo temporário nem publicam o arquivo do outro pela metade
+    descritor, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    os.close(descritor)
+    try:
+        with pa.OSFile(temporario, "wb") as destino:
+            with pa.ipc.new_file(destino, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+
+def abrir_snapshot(caminho):
+    if not os.path.exists(caminho):
+        return None
+
+    with pa.memory_map(caminho, "r") as fonte:
+        tabela = pa.ipc.open_file(fonte).read_all()
+
+    metadados = tabela.schema.metadata or {}
+    marca = metadados.get(b"marca", b"").decode() or None
+
+    return SnapshotDados(
+        tabela.to_pandas(),
+        None,
+        marca=marca,
+        modo="snapshot local",
+        linhas_recebidas=0
+    )
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+
+meses = {1:"Janeiro",2:"Fevereiro",3:"Março",4:"Abril",5:"Maio",6:"Junho",
+         7:"Julho",8:"Agosto",9:"Setembro",10:"Outubro",11:"Novembro",12:"Dezembro"}
+
+ordem_meses = ["Janeiro","Fevereiro","Março","Abril","Maio","Junho",
+               "Julho","Agosto","Setembro","Outubro","Novembro","Dezembro"]
+
+
+# 🔹 Exclusões declaradas na definição do dataset: (coluna, operador, valor)
+OPERADORES = {
+    "==": lambda serie, valor: serie == valor,
+    "!=": lambda serie, valor: serie != valor,
+    "in": lambda serie, valor: serie.isin(valor),
+    "not in": lambda serie, valor: ~serie.isin(valor),
+}
+
+
+def tratar_dataset(df, definicao):
+
+    if definicao.renomear:
+        df = df.rename(columns=definicao.renomear)
+
+    # 🚫 Exclusões (ex.: empresa 7 e status=cancelado)
+    for col, operador, valor in definicao.exclusoes:
+        df = df[OPERADORES[operador](df[col], valor)]
+
+    # ==============================
+    # TRATAR VALORES NULOS
+    # ==============================
+
+    # 🔹 garantir: cria a coluna se a view não tiver; preencher: troca nulos pelo padrão
+    for col, padrao in definicao.garantir.items():
+        df[col] = df.get(col, padrao)
+
+    for col, padrao in definicao.preencher.items():
+        df[col] = df[col].fillna(padrao)
+
+    data = definicao.coluna_data
+
+    # 🔹 ISO-8601 do Postgres: aceita precisão variável (com/sem fração) e fuso na mesma coluna.
+    # Com fuso vai para UTC, sem fuso é lido como UTC; no fim a coluna sai sem fuso
+    # (timestamptz com offsets diferentes não derruba a carga)
+    df[data] = pd.to_datetime(df[data], errors='coerce', format='ISO8601', utc=True).dt.tz_localize(None)
+    df['valor'] = pd.to_numeric(df['valor'], errors='coerce')
+    df = df.dropna(subset=[data,'valor'])
+    df['movimento'] = df['movimento'].str.strip().str.capitalize()
+
+    df['ano'] = df[data].dt.year
+    df['mes'] = df[data].dt.month
+    df['nome_mes'] = df['mes'].map(meses)
+    df['mes_ano'] = df[data].dt.to_period('M').astype(str)
+
+    # ==============================
+    # SEMANA ISO (CHAVE INTEIRA AAAASS)
+    # ==============================
+
+    df["semana_iso"] = semana_iso(df[data])
+
+    return df
+
+
+def semana_iso(datas):
+    # 🔹 Aritmética de datas em numpy: a quinta-feira da semana define o ano ISO
+    dias = datas.to_numpy(dtype="datetime64[D]")
+    dia_semana = (dias.astype(np.int64) + 3) % 7
+    quinta = dias + (3 - dia_semana).astype("timedelta64[D]")
+
+    ano_iso = quinta.astype("datetime64[Y]")
+    semana = (quinta - ano_iso.astype("datetime64[D]")).astype(np.int64) // 7 + 1
+
+    return ((ano_iso.astype(np.int64) + 1970) * 100 + semana).astype(np.int32)
+
+
+def rotular_semanas(chaves):
+    # 🔹 Rótulo "AAAA-Sss" montado só para as semanas distintas, não por linha
+    valores = np.unique(chaves)
+    rotulos = [f"{c // 100}-S{c % 100:02d}" for c in valores.tolist()]
+
+    return pd.Categorical.from_codes(
+        np.searchsorted(valores, chaves),
+        categories=rotulos,
+        ordered=True
+    )
+
+
+# ==============================
+# ESQUEMA DE TIPOS (CATEGÓRICOS / INTEIROS COMPACTOS)
+# ==============================
+
+# 🔹 Muda quando o esquema do frame tratado muda (ex.: semana_iso, data sem fuso); snapshots antigos ficam de fora
+VERSAO_ESQUEMA = 3
+
+
+def aplicar_esquema(df, dimensoes):
+    df = df.copy()
+
+    for col in dimensoes:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    # 🔹 Meses na ordem do calendário, não alfabética
+    df["nome_mes"] = pd.Categorical(df["nome_mes"], categories=ordem_meses, ordered=True)
+
+    # 🔹 mes_ano "AAAA-MM" ordena certo como texto; vira código inteiro ordenado
+    df["mes_ano"] = pd.Categorical(
+        df["mes_ano"],
+        categories=sorted(df["mes_ano"].dropna().unique()),
+        ordered=True
+    )
+
+    df["ano"] = df["ano"].astype("int16")
+    df["mes"] = df["mes"].astype("int8")
+
+    df["semana_iso"] = df["semana_iso"].astype("int32")
+    df["ano_semana"] = rotular_semanas(df["semana_iso"].to_numpy())
+
+    return df
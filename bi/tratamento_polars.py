@@ -0,0 +1,131 @@
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+from bi.tratamento import meses
+
+
+# ==============================
+# TRATAMENTO EM POLARS (LAZY, MULTI-THREAD)
+# ==============================
+
+# 🔹 Mesmas exclusões do pandas; *_missing / fill_null mantêm a regra do pandas para nulos
+# (nulo != valor é verdadeiro, nulo == valor é falso)
+OPERADORES_POLARS = {
+    "==": lambda col, valor: col.eq_missing(valor),
+    "!=": lambda col, valor: col.ne_missing(valor),
+    "in": lambda col, valor: col.is_in(valor).fill_null(False),
+    "not in": lambda col, valor: ~col.is_in(valor).fill_null(False),
+}
+
+
+# 🔹 Formatos ISO-8601 explícitos, do mais completo ao mais curto: %.f aceita fração de
+# qualquer tamanho e %#z aceita "Z", "+00", "-0300" e "-03:00"
+FORMATOS_DATA = [
+    "%Y-%m-%dT%H:%M:%S%.f%#z",
+    "%Y-%m-%d %H:%M:%S%.f%#z",
+    "%Y-%m-%dT%H:%M:%S%.f",
+    "%Y-%m-%d %H:%M:%S%.f",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+]
+
+
+def _datas(col, tipo):
+    # 🔹 Mesma regra do pandas (format="ISO8601", utc=True): com fuso vai para UTC, sem fuso
+    # é lido como UTC, e a coluna sai sem fuso
+    if tipo == pl.String:
+        col = pl.coalesce([
+            col.str.to_datetime(formato, strict=False, time_unit="us", time_zone="UTC")
+            for formato in FORMATOS_DATA
+        ])
+    elif isinstance(tipo, pl.Datetime) and tipo.time_zone:
+        col = col.dt.convert_time_zone("UTC")
+    else:
+        return col
+
+    return col.dt.replace_time_zone(None)
+
+
+def _para_polars(df):
+    colunas = []
+
+    for col in df.columns:
+        serie = df[col]
+        # 🔹 Coluna mista (ex.: valor ora número, ora texto): o Polars cai no supertipo (texto)
+        if serie.dtype == object:
+            colunas.append(pl.Series(col, serie.tolist(), strict=False))
+        else:
+            colunas.append(pl.from_pandas(serie))
+
+    return pl.DataFrame(colunas)
+
+
+def _capitalizar(col):
+    # 🔹 str.capitalize() do Python: primeira letra maiúscula, resto minúsculo
+    return col.str.slice(0, 1).str.to_uppercase() + col.str.slice(1).str.to_lowercase()
+
+
+def tratar_dataset_polars(df, definicao):
+    if pl is None:
+        raise ImportError("BI_TRATAMENTO=polars exige o pacote polars (pip install -r requirements-motores.txt).")
+
+    data = definicao.coluna_data
+    consulta = _para_polars(df).lazy()
+
+    if definicao.renomear:
+        consulta = consulta.rename(definicao.renomear, strict=False)
+
+    # 🚫 Exclusões (ex.: empresa 7 e status=cancelado)
+    for col, operador, valor in definicao.exclusoes:
+        consulta = consulta.filter(OPERADORES_POLARS[operador](pl.col(col), valor))
+
+    colunas = consulta.collect_schema().names()
+
+    consulta = consulta.with_columns(
+        [pl.lit(padrao).alias(col) for col, padrao in definicao.garantir.items() if col not in colunas]
+        + [pl.col(col).fill_null(padrao) for col, padrao in definicao.preencher.items()]
+    )
+
+    datas = _datas(pl.col(data), consulta.collect_schema()[data])
+
+    valores = pl.col("valor")
+    if consulta.collect_schema()["valor"] == pl.String:
+        valores = valores.str.strip_chars()
+
+    consulta = (
+        consulta
+        .with_columns(
+            datas.alias(data),
+            valores.cast(pl.Float64, strict=False).fill_nan(None).alias("valor"),
+        )
+        .drop_nulls([data, "valor"])
+        .with_columns(_capitalizar(pl.col("movimento").str.strip_chars()).alias("movimento"))
+        .with_columns(
+            pl.col(data).dt.year().alias("ano"),
+            pl.col(data).dt.month().alias("mes"),
+            pl.col(data).dt.month().replace_strict(meses, return_dtype=pl.String).alias("nome_mes"),
+            pl.col(data).dt.strftime("%Y-%m").alias("mes_ano"),
+
+            # ==============================
+            # SEMANA ISO (CHAVE INTEIRA AAAASS)
+            # ==============================
+
+            (pl.col(data).dt.iso_year() * 100 + pl.col(data).dt.week()).cast(pl.Int32).alias("semana_iso"),
+        )
+    )
+
+    # 🔹 Volta ao pandas só aqui: cubo, índice e Streamlit/AgGrid seguem no pandas
+    resultado = consulta.collect().to_pandas()
+
+    # 🔹 Texto volta como object; devolve o dtype de texto que a coluna tinha na entrada
+    for col, dtype in df.dtypes.items():
+        col = definicao.renomear.get(col, col)
+        if col in resultado.columns and resultado[col].dtype == object and pd.api.types.is_string_dtype(dtype):
+            resultado[col] = resultado[col].astype(dtype)
+
+    return resultado
@@ -0,0 +1,115 @@
+-- ==============================
+-- AGREGAÇÃO NO SERVIDOR PARA O BI (PUSH-DOWN VIA RPC)
+-- ==============================
+-- Usado quando o app roda com BI_AGREGACAO=rpc (bi/agregacao.py, AgregadorRPC).
+-- A view repete o tratamento de bi/tratamento.tratar_dataset para CONTAS_PAGAR
+-- (bi/datasets.py); a função devolve a soma por grupo num único jsonb, então a
+-- transferência cresce com o número de grupos, não com o de lançamentos.
+--
+-- 🔹 Paridade testada: tests/test_agregacao.py roda a view abaixo (texto deste arquivo)
+-- no DuckDB sobre os mesmos lançamentos brutos e compara com CONTAS_PAGAR.tratar.
+-- Fora do teste (só Postgres): o corpo plpgsql de bi_data_segura, que lá é trocado
+-- por uma macro equivalente; formatos de data que o Postgres aceita e o pandas não
+-- (ex.: '05/01/2024', 'today', 'infinity'); a precisão de numeric (DECIMAL(18,3) no
+-- DuckDB); e a função bi_agregar_contas (SQL dinâmico, jsonb e grants).
+
+-- 🔹 Igual ao pd.to_datetime(errors="coerce", utc=True): data inválida vira nulo em vez de
+-- derrubar a consulta; com fuso vai para UTC, sem fuso é lida como UTC
+create or replace function bi_data_segura(p_valor text)
+returns date
+language plpgsql
+stable
+as $$
+begin
+    -- 🔹 Fuso só conta depois da hora (mesmo PADRAO_FUSO de bi/carga_csv.py);
+    -- ::timestamp sozinho descartaria o offset sem converter
+    if p_valor ~ '\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}(:?\d{2})?)$' then
+        return (p_valor::timestamptz at time zone 'UTC')::date;
+    end if;
+    return p_valor::timestamp::date;
+exception when others then
+    return null;
+end;
+$$;
+
+
+-- 🔹 Linhas tratadas: exclusões, nulos, data, valor, movimento e colunas de calendário
+create or replace view vw_fcontas_bi as
+with base as (
+    select
+        id,
+        razao,
+        coalesce(filial, 'Não informado') as filial,
+        coalesce(pcontas, 'Não informado') as pcontas,
+        coalesce(status, 'Não informado') as status,
+        btrim(movimento::text, E' \t\r\n') as movimento,
+        bi_data_segura(dt_vencimento::text) as dt,
+        -- 🔹 Igual ao pd.to_numeric(errors="coerce"): texto que não é número vira nulo
+        case
+            when btrim(valor::text) ~ '^[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?$'
+            then btrim(valor::text)::numeric
+        end as valor
+    from vw_fcontas_geral_py
+    -- 🚫 Exclusões (nulo não é excluído, como no pandas)
+    where id_empresa is distinct from 7
+      and status is distinct from 'Cancelado'
+)
+select
+    id,
+    razao,
+    filial,
+    pcontas,
+    status,
+    upper(left(movimento, 1)) || lower(substr(movimento, 2)) as movimento,
+    extract(year from dt)::int as ano,
+    extract(month from dt)::int as mes,
+    (array['Janeiro','Fevereiro','Março','Abril','Maio','Junho',
+           'Julho','Agosto','Setembro','Outubro','Novembro','Dezembro'])[extract(month from dt)::int] as nome_mes,
+    to_char(dt, 'YYYY-MM') as mes_ano,
+    extract(isoyear from dt)::int * 100 + extract(week from dt)::int as semana_iso,
+    valor
+from base
+-- 🔹 Data nula ou inválida sai da base, como o dropna do tratamento em pandas
+where dt is not null
+  and valor is not null;
+
+
+-- 🔹 p_dimensoes: grão pedido pelo app (DefinicaoDataset.grao_agregado);
+-- só colunas da lista abaixo entram no SQL dinâmico
+create or replace function bi_agregar_contas(p_dimensoes text[])
+returns jsonb
+language plpgsql
+stable
+as $$
+declare
+    permitidas constant text[] := array[
+        'razao', 'filial', 'status', 'pcontas', 'movimento',
+        'ano', 'mes', 'nome_mes', 'mes_ano', 'semana_iso'
+    ];
+    colunas text;
+    resultado jsonb;
+begin
+    if coalesce(cardinality(p_dimensoes), 0) = 0 or not p_dimensoes <@ permitidas then
+        raise exception 'Dimensões inválidas para agregação: %', p_dimensoes;
+    end if;
+
+    select string_agg(format('%I', d), ', ') into colunas from unnest(p_dimensoes) as d;
+
+    -- 🔹 Mesmas medidas do montar_cubo; primeira_linha = menor id (ordem de carga do app)
+    execute format(
+        'select coalesce(jsonb_agg(to_jsonb(t) order by t.primeira_linha), ''[]''::jsonb)
+           from (
+               select %s, sum(valor) as valor, count(*) as linhas, min(id) as primeira_linha
+                 from vw_fcontas_bi
+                group by %s
+           ) t',
+        colunas, colunas
+    ) into resultado;
+
+    return resultado;
+end;
+$$;
+
+grant execute on function bi_data_segura(text) to anon, authenticated;
+grant select on vw_fcontas_bi to anon, authenticated;
+grant execute on function bi_agregar_contas(text[]) to anon, authenticated;
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 🔹 Pacote bi/ fica na raiz do repositório, um nível acima dos testes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,160 @@
+import copy
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+# ==============================
+# CLIENTE SUPABASE FALSO (EM MEMÓRIA)
+# ==============================
+
+class RespostaFalsa:
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class ConsultaFalsa:
+
+    # 🔹 Só o que bi/carga.buscar_pagina usa: select com count, retry, gt, order e range
+    def __init__(self, linhas, max_linhas):
+        self.linhas = linhas
+        self.max_linhas = max_linhas
+        self.contar = False
+        self.filtros = []
+        self.ordem = None
+        self.faixa = None
+
+    def select(self, *colunas, count=None):
+        self.contar = count == "exact"
+        return self
+
+    def retry(self, habilitado):
+        return self
+
+    def gt(self, coluna, valor):
+        self.filtros.append((coluna, valor))
+        return self
+
+    def order(self, coluna):
+        self.ordem = coluna
+        return self
+
+    def range(self, inicio, fim):
+        self.faixa = (inicio, fim)
+        return self
+
+    def execute(self):
+        linhas = [
+            linha for linha in self.linhas
+            if all(linha.get(col) is not None and str(linha[col]) > str(valor) for col, valor in self.filtros)
+        ]
+        if self.ordem:
+            linhas = sorted(linhas, key=lambda linha: linha[self.ordem])
+
+        total = len(linhas)
+        inicio, fim = self.faixa or (0, total - 1)
+        # 🔹 Como o max-rows do PostgREST: página nunca passa do limite do servidor
+        fim = min(fim, inicio + self.max_linhas - 1)
+
+        return RespostaFalsa(copy.deepcopy(linhas[inicio:fim + 1]), total if self.contar else None)
+
+
+class ClienteFalso:
+
+    def __init__(self, views, max_linhas=1000):
+        self.views = views
+        self.max_linhas = max_linhas
+
+    def table(self, view):
+        return ConsultaFalsa(self.views[view], self.max_linhas)
+
+
+# ==============================
+# POSTGREST FALSO (HTTP/1.1 COM KEEP-ALIVE, LOCAL)
+# ==============================
+
+class _Requisicao(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # 🔹 Um handler por conexão TCP: conta quantas conexões o cliente abriu
+        with self.server.lock:
+            self.server.conexoes += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo=b"", cabecalhos=None):
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _falha_forcada(self):
+        with self.server.lock:
+            self.server.pedidos.append((self.command, self.path))
+            status = self.server.falhas.pop(0) if self.server.falhas else None
+
+        if status is None:
+            return False
+        self._responder(status, b'{"message": "indisponivel"}', {"Retry-After": "0"})
+        return True
+
+    def do_GET(self):
+        if self._falha_forcada():
+            return
+
+        url = urlsplit(self.path)
+        view = url.path.rsplit("/", 1)[-1]
+        linhas = self.server.views.get(view, [])
+        limite = int(parse_qs(url.query).get("limit", [len(linhas)])[0])
+        pagina = linhas[:limite]
+
+        self._responder(200, json.dumps(pagina).encode(), {
+            "Content-Type": "application/json",
+            "Content-Range": f"0-{max(len(pagina) - 1, 0)}/{len(linhas)}",
+        })
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(tamanho)
+        if self._falha_forcada():
+            return
+        self._responder(200, b"[]", {"Content-Type": "application/json"})
+
+
+class ServidorPostgREST:
+
+    # 🔹 falhas: status forçados (ex.: [429, 503]) devolvidos, em ordem, às próximas requisições
+    def __init__(self, views=None):
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), _Requisicao)
+        self.http.daemon_threads = True
+        self.http.lock = threading.Lock()
+        self.http.views = views or {}
+        self.http.falhas = []
+        self.http.pedidos = []
+        self.http.conexoes = 0
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}"
+        threading.Thread(target=self.http.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    @property
+    def pedidos(self):
+        return self.http.pedidos
+
+    @property
+    def conexoes(self):
+        return self.http.conexoes
+
+    def falhar(self, *status):
+        self.http.falhas.extend(status)
+
+    def fechar(self):
+        self.http.shutdown()
+        self.http.server_close()
@@ -0,0 +1,147 @@
+import os
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bi.cubo import montar_cubo
+from bi.datasets import CONTAS_MOVIMENTO, CONTAS_PAGAR, criar_cache
+from postgrest_falso import ClienteFalso
+
+
+def _lancamentos(n=3000, semente=21):
+    r = random.Random(semente)
+    datas_invalidas = ["2024-13-45", "2024-02-30", "abc", "", None]
+
+    linhas = []
+    for i in range(n):
+        data = f"{r.randint(2023, 2025)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}"
+        if r.random() < 0.05:
+            data = r.choice(datas_invalidas)
+
+        valor = round(r.uniform(-5000, 90000), 2)
+        if r.random() < 0.3:
+            valor = r.choice([str(valor), f" {valor} ", "n/d", None])
+
+        linhas.append({
+            "id": i + 1,
+            "id_empresa": r.choice([1, 2, 7, None]),
+            "razao": r.choice(["Razao A", "Razao B", "Razao C", None]),
+            "filial": r.choice(["Filial 1", "Filial 2", None]),
+            "pcontas": r.choice(["001", "002", "010", None]),
+            "status": r.choice(["Pago", "Em aberto", "Cancelado", None]),
+            "movimento": r.choice([" receita", "Despesa ", "DESPESA"]),
+            "dt_vencimento": data,
+            "valor": valor,
+        })
+
+    return linhas
+
+
+def _cubo(agregacao, pasta):
+    cliente = ClienteFalso({CONTAS_PAGAR.view: _lancamentos()}, max_linhas=700)
+    cache = criar_cache(cliente, CONTAS_PAGAR, str(pasta), max_workers=2, agregacao=agregacao)
+    snapshot, _ = cache.obter()
+    return snapshot, montar_cubo(snapshot.df, CONTAS_PAGAR.dimensoes_cubo)
+
+
+def test_sqlite_igual_ao_linhas(tmp_path):
+    linhas, cubo_linhas = _cubo("linhas", tmp_path / "linhas")
+    agregado, cubo_agregado = _cubo("sqlite", tmp_path / "sqlite")
+
+    assert agregado.modo == "agregada"
+    assert len(agregado.df) < len(linhas.df)
+
+    # 🔹 Mesmos grupos, na mesma ordem de primeira ocorrência (o "first()" das abas)
+    colunas = CONTAS_PAGAR.dimensoes_cubo + ["linhas"]
+    pd.testing.assert_frame_equal(cubo_agregado[colunas], cubo_linhas[colunas])
+
+    # 🔹 Soma feita em outra ordem (SQL x pandas): igual até o arredondamento do float64
+    np.testing.assert_allclose(cubo_agregado["valor"], cubo_linhas["valor"], rtol=1e-9)
+
+
+def test_datas_invalidas_ficam_fora_nos_dois(tmp_path):
+    linhas, _ = _cubo("linhas", tmp_path / "linhas")
+    agregado, _ = _cubo("sqlite", tmp_path / "sqlite")
+
+    assert agregado.df["linhas"].sum() == len(linhas.df)
+    assert linhas.df["ano"].between(2023, 2025).all()
+
+
+def test_rpc_sem_funcao_no_dataset(tmp_path):
+    with pytest.raises(ValueError):
+        criar_cache(ClienteFalso({}), CONTAS_MOVIMENTO, str(tmp_path), agregacao="rpc")
+
+
+# ==============================
+# VIEW SQL (vw_fcontas_bi) x TRATAMENTO EM PANDAS
+# ==============================
+
+# 🔹 O que o DuckDB não tem do Postgres, com a mesma semântica; bi_data_segura é plpgsql
+# no arquivo e aqui vira macro (o corpo plpgsql em si não é exercitado)
+FUNCOES_POSTGRES = [
+    "create macro btrim(texto) as trim(texto), (texto, caracteres) as trim(texto, caracteres)",
+    "create macro to_char(dt, formato) as strftime(dt, replace(replace(formato, 'YYYY', '%Y'), 'MM', '%m'))",
+    r"""create macro bi_data_segura(p_valor) as
+        case
+            when regexp_matches(p_valor, '\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}(:?\d{2})?)$')
+            then (try_cast(p_valor as timestamptz) at time zone 'UTC')::date
+            else try_cast(p_valor as timestamp)::date
+        end""",
+]
+
+COLUNAS_VIEW = ["id", "razao", "filial", "pcontas", "status", "movimento",
+                "ano", "mes", "nome_mes", "mes_ano", "semana_iso", "valor"]
+
+
+def _view_no_duckdb(linhas):
+    duckdb = pytest.importorskip("duckdb")
+
+    arquivo = os.path.join(os.path.dirname(__file__), "..", "sql", "bi_agregar_contas.sql")
+    with open(arquivo, encoding="utf-8") as f:
+        view = re.search(r"create or replace view vw_fcontas_bi as.*?;$", f.read(), re.S | re.M).group(0)
+
+    # 🔹 Base bruta como texto, como o Postgres enxerga valor::text e dt_vencimento::text
+    texto = ["razao", "filial", "pcontas", "status", "movimento", "dt_vencimento", "valor"]
+    bruto = pd.DataFrame({
+        col: pd.Series([linha[col] if linha[col] is None else str(linha[col]) for linha in linhas], dtype=object)
+        for col in texto
+    })
+    bruto["id"] = pd.Series([linha["id"] for linha in linhas], dtype="int64")
+    bruto["id_empresa"] = pd.Series([linha["id_empresa"] for linha in linhas], dtype="Int64")
+
+    con = duckdb.connect()
+    for funcao in FUNCOES_POSTGRES:
+        con.execute(funcao)
+    con.register("vw_fcontas_geral_py", bruto)
+    con.execute(view)
+
+    colunas = ", ".join(COLUNAS_VIEW[:-1])
+    return con.execute(f"select {colunas}, valor::double as valor from vw_fcontas_bi order by id").df()
+
+
+def test_view_sql_igual_ao_tratamento():
+    linhas = _lancamentos()
+    # 🔹 timestamptz com offsets e fração: 23:30-03:00 já é o dia (e o mês) seguinte em UTC
+    linhas += [
+        {**linhas[0], "id": len(linhas) + 1, "id_empresa": 1, "status": "Pago", "valor": 10.0, "dt_vencimento": "2024-01-31T23:30:00-03:00"},
+        {**linhas[0], "id": len(linhas) + 2, "id_empresa": 1, "status": "Pago", "valor": 10.0, "dt_vencimento": "2024-12-29T10:00:00.123456+00:00"},
+        {**linhas[0], "id": len(linhas) + 3, "id_empresa": 1, "status": "Pago", "valor": 10.0, "dt_vencimento": "2025-06-30 08:15:00.5"},
+    ]
+
+    sql = _view_no_duckdb(linhas)
+    pandas = CONTAS_PAGAR.tratar(pd.DataFrame(linhas))[COLUNAS_VIEW].sort_values("id").reset_index(drop=True)
+
+    assert 0 < len(sql) < len(linhas)
+    assert sql["mes_ano"].tolist()[-3:] == ["2024-02", "2024-12", "2025-06"]
+    assert sql["id"].tolist() == pandas["id"].tolist()
+
+    # 🔹 Tipos do DuckDB x pandas à parte (int32/int64, texto/str): comparação por valor
+    for col in COLUNAS_VIEW[1:]:
+        assert _valores(sql[col]) == _valores(pandas[col]), col
+
+
+def _valores(serie):
+    return [None if pd.isna(v) else v for v in serie.astype(object)]
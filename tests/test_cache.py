@@ -0,0 +1,82 @@
+import threading
+import time
+
+from bi.cache import CacheDataset, EstadoCache
+
+
+def _esperar(condicao, limite=5.0):
+    fim = time.time() + limite
+    while not condicao():
+        assert time.time() < fim
+        time.sleep(0.01)
+
+
+def _cache_com_verificacao_lenta():
+    liberar = threading.Event()
+    chamadas = []
+
+    def atualizar(base):
+        chamadas.append(base)
+        # 🔹 Primeira chamada é a verificação da partida a frio: fica presa até o teste liberar
+        if len(chamadas) == 1:
+            liberar.wait(5)
+        return f"origem {len(chamadas)}"
+
+    cache = CacheDataset(lambda: "completo", atualizar=atualizar, abrir_local=lambda: "local")
+    return cache, liberar, chamadas
+
+
+def test_atualizar_durante_verificacao_nao_perde_o_horario():
+    cache, liberar, chamadas = _cache_com_verificacao_lenta()
+
+    dados, estado = cache.obter()
+    assert (dados, estado.status) == ("local", "snapshot")
+
+    cache.invalidar()
+    dados, estado = cache.obter()
+
+    # 🔹 Antes: carregado_em=None e TypeError em datetime.fromtimestamp / idade
+    assert (dados, estado.status) == ("local", "hit")
+    assert estado.carregado_em is not None
+    assert estado.idade >= 0
+
+    liberar.set()
+    _esperar(lambda: not cache._verificando)
+
+    # 🔹 O pedido de atualização feito durante a verificação é atendido depois dela
+    dados, estado = cache.obter()
+    assert estado.status == "delta"
+    assert dados == "origem 2"
+    assert len(chamadas) == 2
+
+
+def test_invalidar_completo_durante_verificacao():
+    cache, liberar, _ = _cache_com_verificacao_lenta()
+    cache.obter()
+
+    cache.invalidar(completo=True)
+    assert cache.obter()[0] == "local"
+
+    liberar.set()
+    _esperar(lambda: not cache._verificando)
+
+    # 🔹 Completo descarta os dados: volta ao snapshot local e verifica a origem de novo
+    dados, estado = cache.obter()
+    assert (dados, estado.status) == ("local", "snapshot")
+    assert estado.carregado_em is not None
+    _esperar(lambda: not cache._verificando)
+
+
+def test_idade_sem_horario():
+    assert EstadoCache("miss", None, 0, 0, 0).idade == 0.0
+
+
+def test_invalidar_sem_verificacao_recarrega_na_hora():
+    cache = CacheDataset(lambda: object())
+    primeiro, _ = cache.obter()
+
+    cache.invalidar()
+    segundo, estado = cache.obter()
+
+    assert segundo is not primeiro
+    assert estado.status == "miss"
@@ -0,0 +1,106 @@
+import csv
+import io
+import random
+
+import pytest
+
+from bi import carga_csv
+from bi.carga import juntar_registros
+from bi.carga_csv import FonteCSV, ler_csv_arrow
+from bi.comparativo import diferenca_resultados
+from bi.datasets import CONTAS_PAGAR
+
+
+# 🔹 Mesmo instante como o PostgREST escreve em JSON e como o Postgres escreve em CSV
+DATAS = {
+    "date": lambda d, h, f: (d, d),
+    "timestamp": lambda d, h, f: (f"{d}T{h}{f}", f"{d} {h}{f}"),
+    "timestamptz": lambda d, h, f: (f"{d}T{h}{f}+00:00", f"{d} {h}{f}+00"),
+}
+
+INVALIDAS = ["2024-02-30", "2024-13-01", "abc", "05/01/2024", "", None]
+
+
+def _linhas(tipo_data, n=3000, semente=4):
+    r = random.Random(semente)
+    json, texto = [], []
+
+    for i in range(n):
+        dia = f"{r.randint(2023, 2025)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}"
+        hora = f"{r.randint(0, 23):02d}:{r.randint(0, 59):02d}:{r.randint(0, 59):02d}"
+        # 🔹 Precisão variável na mesma coluna: o Postgres omite a fração quando ela é zero
+        fracao = r.choice(["", ".5", ".123", ".123456"])
+        data_json, data_csv = DATAS[tipo_data](dia, hora, fracao)
+        if r.random() < 0.05:
+            data_json = data_csv = r.choice(INVALIDAS)
+
+        linha = {
+            "id": i + 1,
+            "id_empresa": r.choice([1, 2, 7]),
+            "razao": r.choice(["Razao A", "Razao B"]),
+            "filial": r.choice(["Filial 1", "Filial 2"]),
+            "pcontas": r.choice(["001", "010"]),
+            "status": r.choice(["Pago", "Cancelado"]),
+            "movimento": r.choice([" receita", "Despesa "]),
+            "valor": round(r.uniform(-5000, 9000), 2),
+        }
+        json.append({**linha, "dt_vencimento": data_json})
+        texto.append({**linha, "dt_vencimento": data_csv})
+
+    return json, texto
+
+
+def _csv(linhas, pedaco=777):
+    saida = io.StringIO()
+    escritor = csv.DictWriter(saida, fieldnames=list(linhas[0]), lineterminator="\n")
+    escritor.writeheader()
+    escritor.writerows(linhas)
+    dados = saida.getvalue().encode()
+    return [dados[i:i + pedaco] for i in range(0, len(dados), pedaco)]
+
+
+def _tratado(df):
+    return CONTAS_PAGAR.tipar(CONTAS_PAGAR.tratar(df))
+
+
+@pytest.mark.parametrize("tipo_data", list(DATAS))
+def test_csv_igual_ao_json(tipo_data, monkeypatch):
+    # 🔹 Blocos pequenos: vários lotes Arrow por página, alguns sem nenhuma data válida
+    monkeypatch.setattr(carga_csv, "BLOCO_CSV", 4096)
+    json, texto = _linhas(tipo_data)
+
+    df_json = _tratado(juntar_registros([json]))
+    tabela = ler_csv_arrow(_csv(texto), CONTAS_PAGAR.tipos, CONTAS_PAGAR.coluna_data)
+    df_csv = _tratado(FonteCSV(None, "http://localhost", "chave").juntar([tabela]))
+
+    # 🔹 Toda data válida fica (em qualquer precisão/fuso), só as inválidas e as exclusões saem
+    validas = [
+        linha for linha in json
+        if linha["id_empresa"] != 7 and linha["status"] != "Cancelado" and linha["dt_vencimento"] not in INVALIDAS
+    ]
+    assert len(df_json) == len(validas)
+    assert diferenca_resultados(df_csv, df_json) is None
+
+
+def test_fracao_e_fuso_nao_viram_nulo():
+    tabela = ler_csv_arrow(
+        [b"id,dt_vencimento,valor\n", b"1,2024-01-05 10:00:00.123,1\n2,2024-01-05 10:00:00.123+00,2\n"],
+        {"id": "int64"},
+        "dt_vencimento"
+    )
+
+    # 🔹 Sem fuso numa coluna com fuso: lido como UTC, como no pandas (utc=True)
+    assert tabela.column("dt_vencimento").to_pylist()[0].isoformat() == "2024-01-05T10:00:00.123000+00:00"
+    assert tabela.column("dt_vencimento").to_pylist()[1].isoformat() == "2024-01-05T10:00:00.123000+00:00"
+
+
+def test_data_impossivel_vira_nulo_sem_derrubar_o_bloco():
+    tabela = ler_csv_arrow(
+        [b"dt_vencimento\n2024-02-30\n2024-02-29 23:59:59.5\n\n"],
+        None,
+        "dt_vencimento"
+    )
+
+    assert [str(d) if d else d for d in tabela.column("dt_vencimento").to_pylist()] == [
+        None, "2024-02-29 23:59:59.500000"
+    ]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from bi.comparativo import comparar_meta_atual, meta_vs_atual
+
+
+def _linha_a_linha(df, coluna_meta, coluna_atual):
+    # 🔹 Cálculo antigo (df.apply por linha) usado como referência
+    return df.apply(
+        lambda row: (
+            ((row[coluna_atual] - row[coluna_meta]) / row[coluna_meta]) * 100
+            if row[coluna_meta] != 0 else 0
+        ),
+        axis=1
+    )
+
+
+def test_meta_zero_da_zero_por_cento():
+    df = pd.DataFrame({"meta": [0.0, 0.0, -0.0], "atual": [150.0, 0.0, -20.0]})
+
+    resultado = comparar_meta_atual(df, "meta", "atual", atingimento=True)
+
+    assert resultado["Diferenca_R$"].tolist() == [150.0, 0.0, -20.0]
+    assert resultado["Variação_%"].tolist() == [0.0, 0.0, 0.0]
+    assert resultado["Atingimento_%"].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_atual_zero_da_menos_cem_por_cento():
+    df = pd.DataFrame({"meta": [200.0, -50.0], "atual": [0.0, 0.0]})
+
+    resultado = comparar_meta_atual(df, "meta", "atual", atingimento=True)
+
+    assert resultado["Diferenca_R$"].tolist() == [-200.0, 50.0]
+    assert resultado["Variação_%"].tolist() == [-100.0, -100.0]
+    assert resultado["Atingimento_%"].tolist() == [0.0, 0.0]
+
+
+def test_meta_nula_continua_nula():
+    df = pd.DataFrame({"meta": [np.nan], "atual": [10.0]})
+
+    resultado = comparar_meta_atual(df, "meta", "atual", atingimento=True)
+
+    assert resultado[["Diferenca_R$", "Variação_%", "Atingimento_%"]].isna().all(axis=None)
+
+
+def test_igual_ao_calculo_linha_a_linha():
+    rng = np.random.default_rng(7)
+    meta = rng.normal(0, 1000, 500).round(2)
+    meta[::7] = 0.0
+    meta[::11] = np.nan
+    df = pd.DataFrame({"meta": meta, "atual": rng.normal(0, 1000, 500).round(2)})
+
+    resultado = comparar_meta_atual(df, "meta", "atual")
+
+    pd.testing.assert_series_equal(
+        resultado["Variação_%"], _linha_a_linha(df, "meta", "atual"),
+        check_names=False, check_exact=True
+    )
+
+
+def test_meta_vs_atual_grupo_so_de_um_lado():
+    df_meta = pd.DataFrame({"razao": ["A", "B"], "Meta": [100.0, 0.0]})
+    base = pd.DataFrame({"razao": ["B", "B", "C"], "valor": [10.0, 5.0, 7.0]})
+
+    resultado = meta_vs_atual(df_meta, base, ["razao"], "Meta", "Atual", preencher_meta=True)
+
+    assert resultado["razao"].tolist() == ["A", "B", "C"]
+    # 🔹 Sem lançamento: atual 0 (-100%); sem meta: meta 0 (0%)
+    assert resultado["Atual"].tolist() == [0.0, 15.0, 7.0]
+    assert resultado["Meta"].tolist() == [100.0, 0.0, 0.0]
+    assert resultado["Variação_%"].tolist() == [-100.0, 0.0, 0.0]
@@ -0,0 +1,141 @@
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+from supabase import ClientOptions, create_client
+
+from bi.carga import buscar_pagina
+from bi.conexao import ConexaoHttp
+from postgrest_falso import ServidorPostgREST
+
+
+LINHAS = [{"id": i, "valor": i * 1.5} for i in range(1, 51)]
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorPostgREST({"vw_teste": LINHAS})
+    yield servidor
+    servidor.fechar()
+
+
+@pytest.fixture
+def conexao():
+    conexao = ConexaoHttp(espera_base=0.01)
+    yield conexao
+    conexao.fechar()
+
+
+def _get(conexao, servidor):
+    return conexao.cliente.get(f"{servidor.url}/rest/v1/vw_teste")
+
+
+@pytest.mark.parametrize("status", [429, 502, 503, 504, 520])
+def test_get_repete_falha_passageira(conexao, servidor, status):
+    servidor.falhar(status, status)
+
+    resposta = _get(conexao, servidor)
+
+    assert resposta.status_code == 200
+    assert resposta.json() == LINHAS
+    assert len(servidor.pedidos) == 3
+    assert conexao.estatisticas()["retentativas"] == 2
+
+
+def test_desiste_depois_das_tentativas(conexao, servidor):
+    servidor.falhar(503, 503, 503, 503, 503)
+
+    resposta = _get(conexao, servidor)
+
+    # 🔹 1 tentativa + 3 repetições; a última falha volta para quem chamou
+    assert resposta.status_code == 503
+    assert len(servidor.pedidos) == 4
+    assert conexao.estatisticas()["retentativas"] == 3
+
+
+def test_post_nao_e_repetido(conexao, servidor):
+    servidor.falhar(503)
+
+    resposta = conexao.cliente.post(f"{servidor.url}/rest/v1/rpc/bi_agregar_contas", json={"p_dimensoes": ["ano"]})
+
+    assert resposta.status_code == 503
+    assert servidor.pedidos == [("POST", "/rest/v1/rpc/bi_agregar_contas")]
+    assert conexao.estatisticas()["retentativas"] == 0
+
+
+def test_erro_de_status_definitivo_nao_e_repetido(conexao, servidor):
+    servidor.falhar(404)
+
+    assert _get(conexao, servidor).status_code == 404
+    assert len(servidor.pedidos) == 1
+
+
+def test_conexao_reaproveitada(conexao, servidor):
+    for _ in range(20):
+        assert _get(conexao, servidor).status_code == 200
+
+    estatisticas = conexao.estatisticas()
+    assert servidor.conexoes == 1
+    assert estatisticas["requisicoes"] == 20
+    assert estatisticas["conexoes"] == 1
+    assert estatisticas["reaproveitamento"] == pytest.approx(0.95)
+
+
+def test_falha_repetida_na_mesma_conexao(conexao, servidor):
+    servidor.falhar(503)
+
+    _get(conexao, servidor)
+    _get(conexao, servidor)
+
+    # 🔹 Resposta de falha é lida e fechada antes de repetir: a conexão volta ao pool
+    assert servidor.conexoes == 1
+
+
+def test_protocolo_vem_da_resposta(conexao, servidor):
+    _get(conexao, servidor)
+
+    estatisticas = conexao.estatisticas()
+    # 🔹 Servidor só fala HTTP/1.1: mesmo com h2 instalado, não conta como HTTP/2
+    assert estatisticas["protocolos"] == {"HTTP/1.1": 1}
+    assert estatisticas["http2"] is False
+
+
+def test_erro_de_transporte_e_repetido(conexao):
+    # 🔹 Porta sem servidor: conexão recusada em todas as tentativas
+    with pytest.raises(httpx.ConnectError):
+        conexao.cliente.get("http://127.0.0.1:9/rest/v1/vw_teste")
+
+    estatisticas = conexao.estatisticas()
+    assert estatisticas["erros"] == 4
+    assert estatisticas["retentativas"] == 3
+
+
+def test_cliente_supabase_usa_o_pool(conexao, servidor):
+    supabase = create_client(servidor.url, "chave-teste", options=ClientOptions(httpx_client=conexao.cliente))
+
+    for _ in range(5):
+        assert supabase.table("vw_teste").select("*").limit(10).execute().data == LINHAS[:10]
+
+    assert servidor.conexoes == 1
+    assert conexao.estatisticas()["requisicoes"] == 5
+
+
+def test_uma_so_camada_de_retentativa_no_cliente_supabase(conexao, servidor):
+    supabase = create_client(servidor.url, "chave-teste", options=ClientOptions(httpx_client=conexao.cliente))
+    servidor.falhar(*[503] * 16)
+
+    with pytest.raises(APIError):
+        buscar_pagina(supabase, "vw_teste", 0, 10, coluna_ordem="id")
+
+    # 🔹 Só o transporte repete (1 + 3); com o postgrest-py também repetindo seriam 16 pedidos
+    assert len(servidor.pedidos) == 4
+    assert conexao.estatisticas()["retentativas"] == 3
+
+
+def test_pagina_recupera_pelo_transporte(conexao, servidor):
+    supabase = create_client(servidor.url, "chave-teste", options=ClientOptions(httpx_client=conexao.cliente))
+    servidor.falhar(503, 520)
+
+    resposta, _ = buscar_pagina(supabase, "vw_teste", 0, 10, coluna_ordem="id")
+
+    assert resposta.data == LINHAS[:10]
+    assert len(servidor.pedidos) == 3
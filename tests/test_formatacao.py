@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from bi.formatacao import formatador_reais, formatar_real, formatar_reais
+
+
+# 🔹 Casos de borda: nulos, zero com sinal, empates em ,xx5, infinitos, ≥ 1e12 e negativos
+CASOS = [
+    np.nan, 0.0, -0.0, np.inf, -np.inf,
+    0.005, 0.015, 0.025, 0.125, 1.005, 2.675, 999.995, -999.995, -0.005, -2.675, 1234.565,
+    0.001, -0.001, 0.004999, 0.994999, 999.999, 999999.999,
+    1.0, -1.0, 12.5, 999.0, 1000.0, -1000.0, 1234567.891, -1234567.891,
+    1e12, -1e12, 999999999999.995, 123456789012345.67, 9.99e13, 1e15, -1e15, 2.0 ** 52, 1e20, -1e20,
+]
+
+
+def _aleatorios():
+    rng = np.random.default_rng(0)
+    return np.concatenate([
+        rng.normal(0, 1e6, 20000),
+        np.round(rng.normal(0, 1e5, 20000), 2),
+        np.round(rng.normal(0, 1e3, 10000), 3),
+        rng.integers(-10 ** 12, 10 ** 12, 5000).astype(float),
+        np.arange(-2000, 2000) / 1000,
+        rng.uniform(-1, 1, 5000) * 10.0 ** rng.integers(-3, 14, 5000),
+    ])
+
+
+@pytest.mark.parametrize("valor", CASOS)
+def test_vetorizado_igual_ao_escalar(valor):
+    assert formatar_reais([valor])[0] == formatar_real(valor)
+
+
+def test_vetorizado_igual_ao_escalar_em_massa():
+    valores = np.concatenate([_aleatorios(), CASOS])
+
+    obtido = formatar_reais(valores)
+    esperado = [formatar_real(v) for v in valores]
+
+    divergentes = [(v, a, b) for v, a, b in zip(valores, obtido, esperado) if a != b]
+    assert divergentes == []
+    assert all(type(texto) is str for texto in obtido)
+
+
+def test_valores_conhecidos():
+    assert list(formatar_reais([1234567.891, -0.5, np.nan, -0.0])) == [
+        "R$ 1.234.567,89", "R$ -0,50", "", "R$ -0,00"
+    ]
+    assert formatar_reais([]).tolist() == []
+
+
+def test_formatador_precomputado():
+    valores = np.concatenate([_aleatorios()[:5000], [c for c in CASOS if c != 0]])
+    formatar = formatador_reais(valores)
+
+    assert all(formatar(v) == formatar_real(v) for v in valores)
+
+
+def test_formatador_com_zero_negativo_formata_celula_a_celula():
+    assert formatador_reais([0.0, -0.0]) is formatar_real
+
+
+def test_formatador_fora_do_dicionario_nao_sai_vazio():
+    formatar = formatador_reais([1.0, 2.0])
+
+    # 🔹 Valor que não estava nas colunas passadas: formatado na hora; só NaN vira ""
+    assert formatar(3.5) == "R$ 3,50"
+    assert formatar(-1e13) == formatar_real(-1e13)
+    assert formatar(np.nan) == ""
+    assert formatar(None) == ""
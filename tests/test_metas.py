@@ -0,0 +1,24 @@
+import pandas as pd
+
+from bi.metas import ultimos_meses
+
+
+OPCOES = ["2025-12", "2026-01", "2026-02", "2026-03", "2026-04", "2026-05", "2026-06", "2026-09"]
+
+
+def test_janela_termina_no_ultimo_mes_fechado():
+    # 🔹 Abril e meses futuros (vencimentos a pagar) ficam fora
+    assert ultimos_meses(OPCOES, 3, hoje="2026-04-18") == ["2026-01", "2026-02", "2026-03"]
+
+
+def test_janela_de_calendario_ignora_meses_sem_dados():
+    assert ultimos_meses(OPCOES, 3, hoje="2026-08-01") == ["2026-05", "2026-06"]
+    assert ultimos_meses(OPCOES, 12, hoje="2026-02-10") == ["2025-12", "2026-01"]
+
+
+def test_virada_de_ano():
+    assert ultimos_meses(OPCOES, 2, hoje=pd.Timestamp("2026-01-31")) == ["2025-12"]
+
+
+def test_sem_meses_na_janela():
+    assert ultimos_meses(OPCOES, 6, hoje="2027-06-01") == []
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bi.comparativo import diferenca_resultados, meta_vs_atual
+from bi.cubo import montar_cubo
+from bi.motor_duckdb import TOLERANCIA_ABSOLUTA, TOLERANCIA_RELATIVA, MotorDuckDB
+
+duckdb = pytest.importorskip("duckdb")
+
+
+def _cubo(n=50000, semente=3):
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame({
+        "razao": pd.Categorical(rng.choice([f"Razao {i}" for i in range(40)], n)),
+        "filial": pd.Categorical(rng.choice([f"Filial {i}" for i in range(25)], n)),
+        "status": pd.Categorical(rng.choice(["Pago", "Em aberto", "Vencido"], n)),
+        "ano": rng.choice([2024, 2025], n),
+        "mes": rng.integers(1, 13, n),
+        # 🔹 Centavos com muitas parcelas por grupo: onde fsum e a soma do pandas divergem
+        "valor": rng.normal(-1000, 800, n).round(2),
+    })
+    return montar_cubo(df, ["razao", "filial", "status", "ano", "mes"])
+
+
+def _meta(cubo):
+    grupos = cubo[["razao", "filial"]].drop_duplicates().iloc[::3].reset_index(drop=True)
+    meta = np.random.default_rng(5).normal(-20000, 5000, len(grupos)).round(2)
+    meta[::10] = 0.0
+    return grupos.assign(Meta=meta)
+
+
+@pytest.mark.parametrize("selecoes", [[], [{"ano": [2025], "mes": [1, 2, 3]}], [{"status": ["Pago"]}, {"razao": []}]])
+def test_igual_ao_pandas_dentro_da_tolerancia(selecoes):
+    cubo = _cubo()
+    df_meta = _meta(cubo)
+    base = cubo
+    for selecao in selecoes:
+        for col, valores in selecao.items():
+            if valores:
+                base = base[base[col].isin(valores)]
+
+    opcoes = {"preencher_meta": True, "atingimento": True, "status": True}
+    obtido = MotorDuckDB(cubo).meta_vs_atual(df_meta, selecoes, ["razao", "filial"], "Meta", "Atual", **opcoes)
+    esperado = meta_vs_atual(df_meta, base, ["razao", "filial"], "Meta", "Atual", **opcoes)
+
+    assert diferenca_resultados(
+        obtido, esperado, rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA
+    ) is None
+
+
+def test_tolerancia_nao_aceita_diferenca_real():
+    esperado = pd.DataFrame({"razao": ["A"], "Atual": [-1116.39]})
+
+    assert diferenca_resultados(esperado.assign(Atual=-1116.3899999999996), esperado) is not None
+    assert diferenca_resultados(
+        esperado.assign(Atual=-1116.3899999999996), esperado,
+        rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA
+    ) is None
+    assert diferenca_resultados(
+        esperado.assign(Atual=-1116.38), esperado,
+        rtol=TOLERANCIA_RELATIVA, atol=TOLERANCIA_ABSOLUTA
+    ) is not None
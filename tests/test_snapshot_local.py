@@ -0,0 +1,55 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from bi import snapshot_local
+from bi.sincronizacao import SnapshotDados
+from bi.snapshot_local import abrir_snapshot, salvar_snapshot
+
+
+def _snapshot(n, marca=None):
+    return SnapshotDados(pd.DataFrame({"id": range(n), "valor": [float(i) for i in range(n)]}), None, marca=marca)
+
+
+def test_ida_e_volta(tmp_path):
+    caminho = str(tmp_path / "dados.v2.arrow")
+    salvar_snapshot(caminho, _snapshot(10, marca="2024-01-01T00:00:00+00:00"))
+
+    aberto = abrir_snapshot(caminho)
+    assert aberto.df["id"].tolist() == list(range(10))
+    assert aberto.marca == "2024-01-01T00:00:00+00:00"
+    assert os.listdir(tmp_path) == ["dados.v2.arrow"]
+
+
+def test_gravacoes_simultaneas_publicam_arquivo_inteiro(tmp_path):
+    caminho = str(tmp_path / "dados.v2.arrow")
+    tamanhos = [50_000 + i for i in range(8)]
+
+    threads = [threading.Thread(target=salvar_snapshot, args=(caminho, _snapshot(n))) for n in tamanhos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 🔹 Uma das gravações vence inteira; nenhum temporário fica para trás
+    assert len(abrir_snapshot(caminho).df) in tamanhos
+    assert os.listdir(tmp_path) == ["dados.v2.arrow"]
+
+
+def test_falha_na_gravacao_remove_o_temporario(tmp_path, monkeypatch):
+    caminho = str(tmp_path / "dados.v2.arrow")
+    salvar_snapshot(caminho, _snapshot(3))
+
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(snapshot_local.pa.ipc, "new_file", falhar)
+
+    with pytest.raises(OSError):
+        salvar_snapshot(caminho, _snapshot(5))
+
+    # 🔹 Arquivo anterior continua válido e o temporário foi apagado
+    assert len(abrir_snapshot(caminho).df) == 3
+    assert os.listdir(tmp_path) == ["dados.v2.arrow"]
@@ -0,0 +1,144 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bi.comparativo import diferenca_resultados
+from bi.datasets import CONTAS_MOVIMENTO, CONTAS_PAGAR
+from bi.snapshot_local import abrir_snapshot, salvar_snapshot
+from bi.sincronizacao import SnapshotDados
+from bi.tratamento import VERSAO_ESQUEMA
+
+pytest.importorskip("polars")
+
+
+def _contas_pagar(n=4000, semente=11):
+    r = random.Random(semente)
+    linhas = []
+
+    for i in range(n):
+        linhas.append({
+            "id": i + 1,
+            "id_empresa": r.choice([1, 2, 7, None]),
+            "razao": r.choice(["Razao A", "Razao B", None]),
+            "filial": r.choice(["Filial 1", "Filial 2", None]),
+            "pcontas": r.choice(["001", "002", "010", None]),
+            "status": r.choice(["Pago", "Em aberto", "Cancelado", None]),
+            # 🔹 movimento nulo, em branco e com caixa/espaços misturados
+            "movimento": r.choice([" receita", "Despesa ", "DESPESA", "  ", "", None]),
+            "dt_vencimento": r.choice([
+                f"{r.randint(2023, 2025)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}",
+                # 🔹 timestamptz do PostgREST: offsets diferentes, fração de tamanho variável,
+                # e 23:30-03:00 cai no dia seguinte (às vezes no mês/semana seguinte) em UTC
+                f"{r.randint(2023, 2025)}-{r.randint(1, 12):02d}-28T23:30:00-03:00",
+                f"2024-12-31T22:00:00.{r.randint(1, 999999)}-03:00",
+                f"{r.randint(2023, 2025)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}T10:00:00.5+00:00",
+                f"{r.randint(2023, 2025)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d} 08:15:00.123Z",
+                "2024-13-45", "2024-02-30", "abc", "", None,
+            ]),
+            "valor": r.choice([round(r.uniform(-5000, 9000), 2), "123.45", " 7 ", "n/d", "", None]),
+        })
+
+    return pd.DataFrame(linhas)
+
+
+def _contas_movimento(n=2000, semente=12):
+    r = random.Random(semente)
+
+    return pd.DataFrame({
+        "id": range(1, n + 1),
+        "grupo": [r.choice(["G1", "G2", None]) for _ in range(n)],
+        "fornecedor": [r.choice(["Fornecedor 1", "Fornecedor 2", None]) for _ in range(n)],
+        "pcontas": [r.choice(["001", None]) for _ in range(n)],
+        "tipo_conta": [r.choice(["Fixa", "Variável", None]) for _ in range(n)],
+        "movimento": [r.choice(["receita", " DESPESA", None]) for _ in range(n)],
+        "dt_lancamento": [r.choice(["2024-01-05", "2025-12-31", "2024-02-30", None]) for _ in range(n)],
+        "valor": [r.choice([10.5, -3.25, np.nan]) for _ in range(n)],
+    })
+
+
+def _tratados(definicao, df):
+    # 🔹 Cópias: o tratamento em pandas altera o frame de entrada
+    return definicao.tipar(definicao.tratar_polars(df.copy())), definicao.tipar(definicao.tratar(df.copy()))
+
+
+@pytest.mark.parametrize("definicao, montar", [(CONTAS_PAGAR, _contas_pagar), (CONTAS_MOVIMENTO, _contas_movimento)])
+def test_polars_igual_ao_pandas(definicao, montar):
+    polars, pandas = _tratados(definicao, montar())
+
+    assert diferenca_resultados(polars, pandas) is None
+
+
+def test_datas_e_valores_invalidos_saem_nos_dois():
+    df = _contas_pagar()
+    polars, pandas = _tratados(CONTAS_PAGAR, df)
+
+    assert 0 < len(polars) == len(pandas) < len(df)
+    assert polars["dt_vencimento"].notna().all()
+    assert polars["valor"].notna().all()
+
+
+def test_movimento_nulo_e_em_branco():
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "id_empresa": [1, 1, 1, 1],
+        "razao": ["A", "A", "A", "A"],
+        "filial": ["F", "F", "F", "F"],
+        "pcontas": ["001", "001", "001", "001"],
+        "status": ["Pago", "Pago", "Pago", "Pago"],
+        "movimento": [None, "   ", "", " DESPESA "],
+        "dt_vencimento": ["2024-01-05"] * 4,
+        "valor": [1.0, 2.0, 3.0, 4.0],
+    })
+    polars, pandas = _tratados(CONTAS_PAGAR, df)
+
+    assert diferenca_resultados(polars, pandas) is None
+    assert polars["movimento"].astype(object).tolist()[1:] == ["", "", "Despesa"]
+    assert pd.isna(polars["movimento"].iloc[0])
+
+
+def test_categoricos_com_mesmas_categorias():
+    polars, pandas = _tratados(CONTAS_PAGAR, _contas_pagar())
+
+    for col in CONTAS_PAGAR.dimensoes + ["nome_mes", "mes_ano", "ano_semana"]:
+        assert isinstance(polars[col].dtype, pd.CategoricalDtype), col
+        assert polars[col].dtype == pandas[col].dtype, col
+
+
+def test_snapshot_do_polars_abre_no_esquema_atual(tmp_path):
+    # 🔹 Snapshot local é o mesmo arquivo para os dois tratamentos (mesma VERSAO_ESQUEMA no nome)
+    polars, pandas = _tratados(CONTAS_PAGAR, _contas_pagar())
+    caminho = CONTAS_PAGAR.caminho_snapshot(str(tmp_path))
+    assert caminho.endswith(f".v{VERSAO_ESQUEMA}.arrow")
+
+    salvar_snapshot(caminho, SnapshotDados(polars, None))
+    reaberto = abrir_snapshot(caminho).df
+
+    salvar_snapshot(caminho, SnapshotDados(pandas, None))
+    assert diferenca_resultados(reaberto, abrir_snapshot(caminho).df) is None
+
+
+def test_datas_com_fuso_e_fracao():
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "id_empresa": [1, 1, 1, 1],
+        "razao": ["A", "A", "A", "A"],
+        "filial": ["F", "F", "F", "F"],
+        "pcontas": ["001", "001", "001", "001"],
+        "status": ["Pago", "Pago", "Pago", "Pago"],
+        "movimento": ["Despesa"] * 4,
+        "dt_vencimento": ["2024-01-31T23:30:00-03:00", "2024-01-05T10:00:00.123456+00:00", "2024-01-05 10:00:00.5", "2024-01-05"],
+        "valor": [1.0, 2.0, 3.0, 4.0],
+    })
+    polars, pandas = _tratados(CONTAS_PAGAR, df)
+
+    assert diferenca_resultados(polars, pandas) is None
+    assert str(polars["dt_vencimento"].dtype) == "datetime64[us]"
+    assert polars["dt_vencimento"].tolist() == [
+        pd.Timestamp("2024-02-01 02:30:00"),
+        pd.Timestamp("2024-01-05 10:00:00.123456"),
+        pd.Timestamp("2024-01-05 10:00:00.5"),
+        pd.Timestamp("2024-01-05"),
+    ]
+    assert polars["mes_ano"].tolist() == ["2024-02", "2024-01", "2024-01", "2024-01"]